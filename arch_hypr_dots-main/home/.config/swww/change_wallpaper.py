@@ -1,14 +1,22 @@
 import os
 import random
 import subprocess
+import sys
 import time
 
+sys.path.insert(0, os.path.expanduser("~/Scripts"))
+try:
+    from palette_cache import PaletteCache
+except ImportError:
+    PaletteCache = None
+
 WALLPAPER_DIR = os.path.expanduser("~/Wallpapers")
 INTERVAL_SECONDS = 600
 
 IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".webp"]
 
 previous_wallpaper = None
+palettes = PaletteCache() if PaletteCache else None
 
 
 def get_random_wallpaper(previous):
@@ -44,7 +52,13 @@ def set_wallpaper(image_path):
         ]
     )
 
-    subprocess.run(["wal", "-i", image_path, "-q"])
+    if palettes:
+        try:
+            palettes.apply(image_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"pywal failed: {e}")
+    else:
+        subprocess.run(["wal", "-i", image_path, "-q"])
 
     subprocess.run(
         [
@@ -5,11 +5,8 @@ Displays animated ASCII art of Choso with dynamic effects
 Created for the enhanced Hyprland dotfiles
 """
 
-import time
 import os
 import sys
-import random
-import threading
 from datetime import datetime
 
 class Colors:
@@ -43,6 +40,13 @@ class Colors:
     BG_RED = '\033[41m'
     BG_MAGENTA = '\033[45m'
 
+class MetricsView:
+    """percent/used/total attributes like psutil's results, for ring samples"""
+    def __init__(self, percent, used, total):
+        self.percent = percent or 0
+        self.used = int(used or 0)
+        self.total = int(total or 0)
+
 class AnimatedChoso:
     def __init__(self):
         self.frame = 0
@@ -129,10 +133,19 @@ class AnimatedChoso:
     def display_system_info(self):
         """Display system information with Choso theme"""
         try:
-            import psutil  # type: ignore # Will be available after installation
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            import metrics_ring
+
+            sample = metrics_ring.latest()
+            if sample:
+                # Collector running: no sampling, no one second wait
+                cpu_percent = sample["cpu"] or 0
+                memory = MetricsView(sample["mem_percent"], sample["mem_used"], sample["mem_total"])
+                disk = MetricsView(sample["disk_percent"], sample["disk_used"], sample["disk_total"])
+            else:
+                import psutil  # type: ignore # Will be available after installation
+                cpu_percent = psutil.cpu_percent(interval=1)
+                memory = psutil.virtual_memory()
+                disk = psutil.disk_usage('/')
             
             info = f"""
 {Colors.BRIGHT_CYAN}┌─────────────────────────────────────────────────┐
@@ -155,6 +168,8 @@ class AnimatedChoso:
 
 def animate_choso(duration=8):
     """Main animation function"""
+    import time
+
     choso = AnimatedChoso()
     
     try:
@@ -210,11 +225,11 @@ def static_choso():
     choso = AnimatedChoso()
     choso_art = choso.get_choso_frame(0)
     title = choso.get_title_frame(0)
-    info = choso.display_system_info()
     
+    # Art first so the prompt area fills before system info is collected
     print(choso_art)
-    print(title)
-    print(info)
+    print(title, flush=True)
+    print(choso.display_system_info())
     print(f"\n{Colors.BRIGHT_MAGENTA}\"I am Choso. I exist for my younger brothers.\"{Colors.RESET}\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Collector Benchmarks
+Time the native readers in proc_metrics against synthetic /proc trees, so
+their cost can be checked for machines much busier than this one, and check
+the GPU reader against a fake sysfs tree on machines without those GPUs.
+
+--collectors runs every dashboard collector (CPU, memory, disks, network,
+temperature, battery, processes, GPU) through psutil, when installed, and
+through the native readers, reporting per-call latency and the memory each
+call allocates (tracemalloc). With --check it exits non-zero when a native
+collector is over its latency or allocation budget, for use in CI.
+
+Usage:
+  collector-bench.py [--processes N] [--scans N]
+  collector-bench.py --gpu
+  collector-bench.py --collectors [--calls N] [--check]
+"""
+
+import gc
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import proc_metrics
+from proc_metrics import GpuMonitor, ProcessTracker
+
+NAMES = ["kitty", "Web Content", "Hyprland", "waybar", "(sd-pam)", "python3", "a) b"]
+
+
+class FakeProcTree:
+    """Directory laid out like /proc with only <pid>/stat files
+
+    Every tick() advances the CPU time of a random subset of processes and
+    churns PIDs: some exit, new ones appear and a few exited PIDs are
+    reused with a new start time.
+    """
+
+    def __init__(self, root, processes, seed=1):
+        self.root = root
+        self.random = random.Random(seed)
+        self.processes = {}
+        self.next_pid = 100
+        self.clock = 1000
+        for _ in range(processes):
+            self.spawn()
+
+    def write(self, pid):
+        name, ticks, started = self.processes[pid]
+        # Fields after the name: state ppid ... utime(14) stime(15) ... starttime(22)
+        fields = ["S", "1"] + ["0"] * 9 + [str(ticks), "0"] + ["0"] * 6 + [str(started)]
+        fields += ["0"] * 30
+        with open(os.path.join(self.root, str(pid), "stat"), "w") as f:
+            f.write(f"{pid} ({name}) {' '.join(fields)}\n")
+
+    def spawn(self, pid=None):
+        if pid is None:
+            pid = self.next_pid
+            self.next_pid += 1
+        os.makedirs(os.path.join(self.root, str(pid)), exist_ok=True)
+        self.processes[pid] = (self.random.choice(NAMES), 0, self.clock)
+        self.write(pid)
+        return pid
+
+    def exit(self, pid):
+        del self.processes[pid]
+        shutil.rmtree(os.path.join(self.root, str(pid)))
+
+    def tick(self, busy_fraction=0.05, churn_fraction=0.01):
+        self.clock += 100
+        pids = list(self.processes)
+        for pid in self.random.sample(pids, max(1, int(len(pids) * busy_fraction))):
+            name, ticks, started = self.processes[pid]
+            self.processes[pid] = (name, ticks + self.random.randint(1, 100), started)
+            self.write(pid)
+
+        churn = max(1, int(len(pids) * churn_fraction))
+        exited = self.random.sample(pids, churn)
+        for pid in exited:
+            self.exit(pid)
+        for pid in exited[: churn // 4]:
+            # PID reuse: same number, different process
+            self.spawn(pid)
+        for _ in range(churn - churn // 4):
+            self.spawn()
+
+
+def benchmark_process_tracker(processes=5000, scans=10):
+    """Scan time of ProcessTracker and a check of its top-N against a full sort"""
+    with tempfile.TemporaryDirectory() as root:
+        tree = FakeProcTree(root, processes)
+        tracker = ProcessTracker(root)
+        tracker.scan()
+
+        scan_ms, top_ms = [], []
+        for _ in range(scans):
+            tree.tick()
+            start = time.perf_counter()
+            usage = tracker.scan()
+            scan_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            top = tracker.top(usage, 5)
+            top_ms.append((time.perf_counter() - start) * 1000)
+
+            expected = sorted(usage.values(), key=lambda v: v[1], reverse=True)[:5]
+            if [p[2] for p in top] != [v[1] for v in expected]:
+                print("❌ top() disagrees with a full sort")
+                return False
+            if set(usage) != set(tree.processes):
+                print("❌ Tracked PIDs do not match the tree after churn")
+                return False
+
+    print(f"🔎 ProcessTracker, {processes} processes, {scans} scans")
+    print(f"   scan:  median {statistics.median(scan_ms):.1f}ms, max {max(scan_ms):.1f}ms")
+    print(f"   top 5: median {statistics.median(top_ms):.2f}ms")
+    print(f"   per process: {statistics.median(scan_ms) * 1000 / processes:.1f}µs")
+
+    tracker = ProcessTracker()
+    tracker.scan()
+    start = time.perf_counter()
+    usage = tracker.scan()
+    print(f"   this machine: {len(usage)} processes in {(time.perf_counter() - start) * 1000:.1f}ms")
+    return True
+
+
+def build_gpu_tree(root):
+    """Fake /sys with an amdgpu dGPU (card1) and an i915 iGPU (card0)
+
+    Returns the values GpuMonitor should read from it.
+    """
+
+    def write(path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    cards = {"card0": ("0000:00:02.0", "i915"), "card1": ("0000:03:00.0", "amdgpu")}
+    for card, (address, driver) in cards.items():
+        device = os.path.join(root, "devices", "pci0000:00", address)
+        os.makedirs(os.path.join(root, "bus", "pci", "drivers", driver), exist_ok=True)
+        os.makedirs(os.path.join(device, "drm", card), exist_ok=True)
+        os.symlink(os.path.join(root, "bus", "pci", "drivers", driver), os.path.join(device, "driver"))
+        os.symlink(device, os.path.join(device, "drm", card, "device"))
+        os.makedirs(os.path.join(root, "class", "drm"), exist_ok=True)
+        os.symlink(os.path.join(device, "drm", card), os.path.join(root, "class", "drm", card))
+    # A connector, which must not be taken for a card
+    os.makedirs(os.path.join(root, "class", "drm", "card1-DP-1"))
+
+    amd = os.path.join(root, "class", "drm", "card1", "device")
+    write(os.path.join(amd, "gpu_busy_percent"), "37\n")
+    write(os.path.join(amd, "pp_dpm_sclk"), "0: 500Mhz\n1: 1800Mhz *\n2: 2600Mhz\n")
+    write(os.path.join(amd, "pp_dpm_mclk"), "0: 96Mhz\n1: 1000Mhz *\n")
+    write(os.path.join(amd, "mem_info_vram_used"), "2147483648\n")
+    write(os.path.join(amd, "mem_info_vram_total"), "8589934592\n")
+    write(os.path.join(amd, "hwmon", "hwmon4", "temp1_input"), "55000\n")
+    write(os.path.join(amd, "hwmon", "hwmon4", "power1_average"), "45200000\n")
+
+    intel = os.path.join(root, "class", "drm", "card0")
+    write(os.path.join(intel, "gt_act_freq_mhz"), "1100\n")
+    write(os.path.join(intel, "gt_max_freq_mhz"), "1450\n")
+
+    return [
+        {"card": "card0", "driver": "i915", "freq": 1100, "max_freq": 1450},
+        {
+            "card": "card1", "driver": "amdgpu", "busy": 37, "freq": 1800,
+            "max_freq": 2600, "mem_freq": 1000, "vram_used": 2147483648,
+            "vram_total": 8589934592, "temp": 55.0, "power": 45.2,
+        },
+    ]
+
+
+def check_gpu_monitor():
+    """GpuMonitor against the fake tree, fresh and from its path cache"""
+    with tempfile.TemporaryDirectory() as root:
+        expected = build_gpu_tree(root)
+        cache = os.path.join(root, "gpus.cache")
+        for attempt in ("discovery", "cached paths"):
+            monitor = GpuMonitor(root, cache)
+            gpus = monitor.read()
+            monitor.close()
+            if gpus != expected:
+                print(f"❌ GpuMonitor ({attempt}) read {gpus}")
+                return False
+        if monitor.primary(gpus)["card"] != "card1":
+            print("❌ primary() did not pick the dGPU")
+            return False
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            monitor = GpuMonitor(root, cache)
+            monitor.read()
+            monitor.close()
+        per_call = (time.perf_counter() - start) * 1000
+
+    print("🎮 GpuMonitor: fake amdgpu + i915 tree read correctly")
+    print(f"   open + read from cached paths: {per_call:.0f}µs")
+    return True
+
+
+# collector: (median latency budget ms, peak allocation budget KiB) of the
+# native reader; generous enough for a busy desktop, tight enough to catch
+# a reader that starts forking, re-discovering or copying whole files
+BUDGETS = {
+    "cpu": (0.5, 32),
+    "memory": (0.5, 32),
+    "disks": (2.0, 64),
+    "network": (0.5, 32),
+    "temperature": (1.0, 16),
+    "battery": (1.0, 16),
+    "processes": (40.0, 1024),
+    "gpu": (1.0, 16),
+}
+
+
+def native_collectors(snapshot_dir):
+    """Warm native readers, as the dashboards and the collector keep them"""
+    cpu = proc_metrics.CpuUsageTracker()
+    meminfo = proc_metrics.ProcFile("/proc/meminfo")
+    disks = proc_metrics.DiskMonitor(
+        snapshot_file=os.path.join(snapshot_dir, "diskstats")
+    )
+    network = proc_metrics.NetworkMonitor(
+        snapshot_file=os.path.join(snapshot_dir, "netdev")
+    )
+    sensors = proc_metrics.SensorRegistry(cache_file=os.path.join(snapshot_dir, "sensors"))
+    processes = ProcessTracker()
+    gpus = GpuMonitor(cache_file=os.path.join(snapshot_dir, "gpus"))
+    return {
+        "cpu": cpu.update,
+        "memory": lambda: proc_metrics.memory_usage(
+            proc_metrics.parse_meminfo(meminfo.read())
+        ),
+        "disks": lambda: disks.update(min_age=0.0001),
+        "network": lambda: network.update(min_age=0.0001),
+        "temperature": sensors.cpu_temperature,
+        "battery": proc_metrics.read_power_supply,
+        "processes": processes.scan,
+        "gpu": gpus.read,
+    }
+
+
+def psutil_collectors():
+    """The psutil calls system-info.py used for the same data, or {}"""
+    try:
+        import psutil  # type: ignore # pylint: disable=import-error
+    except ImportError:
+        return {}
+    psutil.cpu_percent(percpu=True)
+    return {
+        "cpu": lambda: psutil.cpu_percent(percpu=True),
+        "memory": psutil.virtual_memory,
+        "disks": lambda: (
+            [psutil.disk_usage(p.mountpoint) for p in psutil.disk_partitions()],
+            psutil.disk_io_counters(perdisk=True),
+        ),
+        "network": lambda: psutil.net_io_counters(pernic=True),
+        "temperature": psutil.sensors_temperatures,
+        "battery": psutil.sensors_battery,
+        "processes": lambda: [
+            p.info for p in psutil.process_iter(["name", "cpu_percent"])
+        ],
+    }
+
+
+def measure(call, calls):
+    """(median ms, p95 ms, peak KiB allocated per call, objects kept per call)
+
+    CPython has no per-call allocation counter; the tracemalloc peak above
+    the memory in use before the call stands in for it. Objects kept is the
+    growth of GC-tracked objects over all calls, which should stay at zero.
+    """
+    call()
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        call()
+        peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+
+    gc.collect()
+    before = len(gc.get_objects())
+    for _ in range(calls):
+        call()
+    gc.collect()
+    kept = len(gc.get_objects()) - before
+
+    return (
+        statistics.median(times),
+        times[min(len(times) - 1, int(len(times) * 0.95))],
+        statistics.median(peaks) / 1024,
+        max(kept, 0) / calls,
+    )
+
+
+def benchmark_collectors(calls=200, check=False):
+    """Latency and allocations of every collector; False if over budget"""
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        implementations = [("native", native_collectors(snapshot_dir))]
+        library = psutil_collectors()
+        if library:
+            implementations.append(("psutil", library))
+        else:
+            print("ℹ️  psutil not installed, timing the native readers only")
+
+        print(f"⏱️  Collectors, {calls} calls each")
+        print(f"   {'collector':<12}{'impl':<8}{'median':>9}{'p95':>9}{'alloc':>10}{'kept':>7}")
+        within_budget = True
+        for name, (latency_budget, alloc_budget) in BUDGETS.items():
+            for implementation, collectors in implementations:
+                if name not in collectors:
+                    continue
+                # Process scans are far slower; fewer calls give the same median
+                count = max(5, calls // 20) if name == "processes" else calls
+                median, p95, peak, kept = measure(collectors[name], count)
+                status = ""
+                if implementation == "native":
+                    over = median > latency_budget or peak > alloc_budget
+                    within_budget &= not over
+                    status = " ❌ over budget" if over else " ✅"
+                print(
+                    f"   {name:<12}{implementation:<8}{median:>7.3f}ms{p95:>7.3f}ms"
+                    f"{peak:>7.1f}KiB{kept:>7.1f}{status}"
+                )
+
+    print("   alloc: peak memory allocated during one call; kept: objects left")
+    print("   alive per call afterwards (anything above zero there is a leak)")
+    if check and not within_budget:
+        print("❌ A native collector is over its budget")
+    return within_budget or not check
+
+
+def main():
+    args = sys.argv[1:]
+    if args == ["--gpu"]:
+        sys.exit(0 if check_gpu_monitor() else 1)
+    if args and args[0] == "--collectors":
+        calls = int(args[args.index("--calls") + 1]) if "--calls" in args else 200
+        sys.exit(0 if benchmark_collectors(calls, "--check" in args) else 1)
+    if args and args[0] not in ("--processes", "--scans"):
+        print(__doc__.strip().split("Usage:")[1])
+        return
+    processes = int(args[args.index("--processes") + 1]) if "--processes" in args else 5000
+    scans = int(args[args.index("--scans") + 1]) if "--scans" in args else 10
+    sys.exit(0 if benchmark_process_tracker(processes, scans) else 1)
+
+
+if __name__ == "__main__":
+    main()
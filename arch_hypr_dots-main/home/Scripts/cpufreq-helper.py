@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+CPU Frequency Policy Helper
+Privileged helper used by performance-manager.py. Writes governor, energy
+performance preference, min/max frequency and turbo for every
+/sys/devices/system/cpu/cpufreq/policy* in one pass, and remembers the
+values found before the first change so they can be restored.
+
+Installed root-owned as /usr/local/bin/choso-cpufreq-helper and allowed
+through sudoers by post_install. --root points it at a fake sysfs tree and
+is refused when running as root.
+
+Usage:
+  cpufreq-helper.py apply [--governor g1,g2] [--epp name] [--min-freq kHz|N%]
+                          [--max-freq kHz|N%] [--turbo on|off] [--root dir]
+  cpufreq-helper.py restore [--root dir]
+  cpufreq-helper.py show [--root dir]
+"""
+
+import json
+import os
+import re
+import sys
+
+CPUFREQ_DIR = "sys/devices/system/cpu/cpufreq"
+INTEL_NO_TURBO = "sys/devices/system/cpu/intel_pstate/no_turbo"
+BOOST = "sys/devices/system/cpu/cpufreq/boost"
+STATE_FILE = "run/choso-cpufreq.json"
+
+NAME_PATTERN = re.compile(r"^[a-z_]+(,[a-z_]+)*$")
+FREQ_PATTERN = re.compile(r"^\d+%?$")
+
+
+def read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def as_int(value):
+    return int(value) if value and value.isdigit() else None
+
+
+def write(path, value):
+    """Write one sysfs value, returning an error string on failure"""
+    try:
+        with open(path, "w") as f:
+            f.write(str(value))
+        return None
+    except OSError as e:
+        return f"{path}: {e.strerror}"
+
+
+class CpuFreqPolicy:
+    def __init__(self, root="/"):
+        self.root = root
+        self.state_file = os.path.join(root, STATE_FILE)
+
+    def policies(self):
+        """Paths of all cpufreq policy directories"""
+        base = os.path.join(self.root, CPUFREQ_DIR)
+        try:
+            names = sorted(n for n in os.listdir(base) if n.startswith("policy"))
+        except OSError:
+            return []
+        return [os.path.join(base, name) for name in names]
+
+    def turbo_path(self):
+        """(path, value meaning 'on') for whichever turbo knob exists"""
+        for relative, on_value in ((INTEL_NO_TURBO, "0"), (BOOST, "1")):
+            path = os.path.join(self.root, relative)
+            if os.path.exists(path):
+                return path, on_value
+        return None, None
+
+    def snapshot(self):
+        """Current values of every knob this helper touches"""
+        state = {"policies": {}, "turbo": None}
+        for policy in self.policies():
+            state["policies"][os.path.basename(policy)] = {
+                "governor": read(os.path.join(policy, "scaling_governor")),
+                "epp": read(os.path.join(policy, "energy_performance_preference")),
+                "min_freq": read(os.path.join(policy, "scaling_min_freq")),
+                "max_freq": read(os.path.join(policy, "scaling_max_freq")),
+            }
+        path, on_value = self.turbo_path()
+        if path:
+            state["turbo"] = read(path) == on_value
+        return state
+
+    def saved_state(self):
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def resolve_freq(self, policy, value):
+        """kHz value for a plain number or a percentage of the hardware max"""
+        if value is None:
+            return None
+        if value.endswith("%"):
+            hw_max = read(os.path.join(policy, "cpuinfo_max_freq"))
+            hw_min = read(os.path.join(policy, "cpuinfo_min_freq"))
+            if not hw_max:
+                return None
+            freq = int(hw_max) * int(value[:-1]) // 100
+            return max(freq, int(hw_min or 0))
+        return int(value)
+
+    def write_policy(
+        self, policy, governor=None, epp=None, min_freq=None, max_freq=None
+    ):
+        """Write one policy directory, ordered so the kernel accepts each value"""
+        errors = []
+
+        if governor:
+            available = read(os.path.join(policy, "scaling_available_governors"))
+            available = (available or "").split()
+            choice = next((g for g in governor.split(",") if g in available), None)
+            if choice:
+                errors.append(write(os.path.join(policy, "scaling_governor"), choice))
+            else:
+                errors.append(f"{policy}: none of {governor} available")
+
+        # EPP only exists with intel_pstate/amd-pstate active and has to come
+        # after the governor (the performance governor pins it)
+        epp_path = os.path.join(policy, "energy_performance_preference")
+        if epp and os.path.exists(epp_path):
+            errors.append(write(epp_path, epp))
+
+        current_max = int(read(os.path.join(policy, "scaling_max_freq")) or 0)
+        min_first = min_freq is None or min_freq <= current_max
+        order = [("scaling_min_freq", min_freq), ("scaling_max_freq", max_freq)]
+        for name, value in order if min_first else reversed(order):
+            if value is not None:
+                errors.append(write(os.path.join(policy, name), value))
+
+        return [e for e in errors if e]
+
+    def apply(self, governor=None, epp=None, min_freq=None, max_freq=None, turbo=None):
+        """Apply a CPU policy; knobs left unset go back to their saved values"""
+        saved = self.saved_state()
+        if saved is None:
+            saved = self.snapshot()
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            with open(self.state_file, "w") as f:
+                json.dump(saved, f)
+
+        errors = []
+        for policy in self.policies():
+            original = saved["policies"].get(os.path.basename(policy), {})
+            min_khz = self.resolve_freq(policy, min_freq)
+            max_khz = self.resolve_freq(policy, max_freq)
+            errors += self.write_policy(
+                policy,
+                governor or original.get("governor"),
+                epp or original.get("epp"),
+                min_khz if min_khz is not None else as_int(original.get("min_freq")),
+                max_khz if max_khz is not None else as_int(original.get("max_freq")),
+            )
+
+        turbo = saved.get("turbo") if turbo is None else turbo
+        path, on_value = self.turbo_path()
+        if path and turbo is not None:
+            off_value = "1" if on_value == "0" else "0"
+            errors.append(write(path, on_value if turbo else off_value))
+
+        return [e for e in errors if e]
+
+    def restore(self):
+        """Put back the values saved before the first apply"""
+        saved = self.saved_state()
+        if saved is None:
+            return []
+
+        errors = []
+        for policy in self.policies():
+            original = saved["policies"].get(os.path.basename(policy))
+            if original:
+                errors += self.write_policy(
+                    policy,
+                    original.get("governor"),
+                    original.get("epp"),
+                    as_int(original.get("min_freq")),
+                    as_int(original.get("max_freq")),
+                )
+
+        path, on_value = self.turbo_path()
+        if path and saved.get("turbo") is not None:
+            off_value = "1" if on_value == "0" else "0"
+            errors.append(write(path, on_value if saved["turbo"] else off_value))
+
+        os.unlink(self.state_file)
+        return [e for e in errors if e]
+
+
+def parse_args(argv):
+    """Validated options; values end up in sysfs as root, so be strict"""
+    options = {}
+    flags = {
+        "--governor": ("governor", NAME_PATTERN),
+        "--epp": ("epp", NAME_PATTERN),
+        "--min-freq": ("min_freq", FREQ_PATTERN),
+        "--max-freq": ("max_freq", FREQ_PATTERN),
+        "--turbo": ("turbo", re.compile(r"^(on|off)$")),
+        "--root": ("root", re.compile(r"^/.*")),
+    }
+    i = 0
+    while i < len(argv):
+        if argv[i] not in flags or i + 1 >= len(argv):
+            raise ValueError(f"unexpected argument: {argv[i]}")
+        name, pattern = flags[argv[i]]
+        if not pattern.match(argv[i + 1]):
+            raise ValueError(f"invalid value for {argv[i]}: {argv[i + 1]}")
+        options[name] = argv[i + 1]
+        i += 2
+
+    if "turbo" in options:
+        options["turbo"] = options["turbo"] == "on"
+    if "root" in options and os.geteuid() == 0:
+        raise ValueError("--root is only allowed for unprivileged test runs")
+    return options
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("apply", "restore", "show"):
+        print(__doc__.strip().split("Usage:")[1])
+        return 2
+
+    try:
+        options = parse_args(sys.argv[2:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+
+    cpufreq = CpuFreqPolicy(options.pop("root", "/"))
+    if sys.argv[1] == "show":
+        state = {"current": cpufreq.snapshot(), "saved": cpufreq.saved_state()}
+        print(json.dumps(state, indent=2))
+        return 0
+
+    errors = cpufreq.apply(**options) if sys.argv[1] == "apply" else cpufreq.restore()
+    for error in errors:
+        print(f"⚠️ {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
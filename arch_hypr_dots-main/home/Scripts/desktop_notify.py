@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Desktop Notifications over D-Bus
+Shared notifier for the ~/Scripts tools. Keeps one session bus connection
+per process and calls org.freedesktop.Notifications.Notify directly, reusing
+the notification id per logical channel ("performance", "gesture",
+"wallpaper", ...) so follow-up messages edit the same toast instead of
+stacking new ones. Ids are kept in $XDG_RUNTIME_DIR so separate runs of a
+script share them too.
+
+The bus is taken from DBUS_SESSION_BUS_ADDRESS, so pointing that at a
+private dbus-daemon with a stand-in notification service is enough to test
+it; --check does exactly that. Falls back to notify-send when jeepney
+(python-jeepney) is missing.
+
+Usage:
+  desktop_notify.py --check
+"""
+
+import os
+import sys
+
+APP_NAME = "choso-scripts"
+
+_connection = None
+_channel_ids = None
+
+
+def ids_path():
+    """File holding the last notification id of each channel"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/tmp/choso-{os.getuid()}")
+    return os.path.join(runtime_dir, "choso", "notify-ids")
+
+
+def load_channel_ids():
+    """Channel ids, read once per process"""
+    global _channel_ids
+    if _channel_ids is None:
+        _channel_ids = {}
+        try:
+            with open(ids_path(), "r") as f:
+                for line in f:
+                    channel, _, notification_id = line.strip().partition("=")
+                    if notification_id.isdigit():
+                        _channel_ids[channel] = int(notification_id)
+        except OSError:
+            pass
+    return _channel_ids
+
+
+def save_channel_id(channel, notification_id):
+    """Remember the id a channel's toast got from the server"""
+    ids = load_channel_ids()
+    if ids.get(channel) == notification_id:
+        return
+    ids[channel] = notification_id
+    try:
+        os.makedirs(os.path.dirname(ids_path()), mode=0o700, exist_ok=True)
+        tmp = f"{ids_path()}.{os.getpid()}"
+        with open(tmp, "w") as f:
+            f.writelines(f"{name}={value}\n" for name, value in ids.items())
+        os.replace(tmp, ids_path())
+    except OSError:
+        pass
+
+
+def get_connection():
+    """Session bus connection, opened on first use and then kept"""
+    global _connection
+    if _connection is None:
+        from jeepney.io.blocking import open_dbus_connection  # type: ignore # pylint: disable=import-error
+
+        _connection = open_dbus_connection(bus="SESSION")
+    return _connection
+
+
+def close():
+    """Drop the cached bus connection"""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def notify_dbus(message, title, icon, timeout, replaces_id, hints):
+    """Call Notify on the session bus and return the notification id"""
+    from jeepney import DBusAddress, new_method_call  # type: ignore # pylint: disable=import-error
+
+    address = DBusAddress(
+        "/org/freedesktop/Notifications",
+        bus_name="org.freedesktop.Notifications",
+        interface="org.freedesktop.Notifications",
+    )
+    request = new_method_call(
+        address,
+        "Notify",
+        "susssasa{sv}i",
+        (APP_NAME, replaces_id, icon, title, message, [], hints, timeout),
+    )
+    reply = get_connection().send_and_get_reply(request, timeout=2)
+    return reply.body[0]
+
+
+def notify(
+    message,
+    title,
+    icon="dialog-information",
+    timeout=3000,
+    channel=None,
+    progress=None,
+    urgency=None,
+):
+    """Show or update a notification; returns False if nothing could show it
+
+    Messages sent on the same channel replace each other. progress (0-100)
+    is passed as the "value" hint, which swaync draws as a progress bar.
+    """
+    replaces_id = load_channel_ids().get(channel, 0) if channel else 0
+
+    hints = {}
+    if progress is not None:
+        hints["value"] = ("i", int(progress))
+    if urgency is not None:
+        hints["urgency"] = ("y", urgency)
+
+    try:
+        notification_id = notify_dbus(
+            message, title, icon, timeout, replaces_id, hints
+        )
+    except ImportError:
+        return notify_send(message, title, icon, timeout, progress, urgency)
+    except Exception:
+        # Stale connection (e.g. the notification daemon restarted): retry once
+        close()
+        try:
+            notification_id = notify_dbus(
+                message, title, icon, timeout, replaces_id, hints
+            )
+        except Exception:
+            return notify_send(message, title, icon, timeout, progress, urgency)
+
+    if channel:
+        save_channel_id(channel, notification_id)
+    return True
+
+
+URGENCY_NAMES = ("low", "normal", "critical")
+
+
+def notify_send(message, title, icon, timeout, progress=None, urgency=None):
+    """Fallback that forks notify-send"""
+    import subprocess
+
+    command = ["notify-send", "-i", icon, "-t", str(timeout)]
+    if progress is not None:
+        command += ["-h", f"int:value:{int(progress)}"]
+    if urgency is not None:
+        command += ["-u", URGENCY_NAMES[urgency]]
+    try:
+        subprocess.run(command + [title, message], check=False)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+BUS_CONFIG = """<busconfig>
+  <type>session</type>
+  <listen>unix:path={path}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+def serve_stub(address, calls, ready, stop, first_id=41):
+    """Stand-in org.freedesktop.Notifications recording every Notify call"""
+    from jeepney import HeaderFields, MessageType, new_method_return  # type: ignore # pylint: disable=import-error
+    from jeepney.bus_messages import message_bus  # type: ignore # pylint: disable=import-error
+    from jeepney.io.blocking import open_dbus_connection  # type: ignore # pylint: disable=import-error
+
+    next_id = first_id
+    with open_dbus_connection(bus=address) as conn:
+        conn.send_and_get_reply(message_bus.RequestName("org.freedesktop.Notifications"))
+        ready.set()
+        while not stop.is_set():
+            try:
+                msg = conn.receive(timeout=0.1)
+            except TimeoutError:
+                continue
+            if (
+                msg.header.message_type == MessageType.method_call
+                and msg.header.fields.get(HeaderFields.member) == "Notify"
+            ):
+                calls.append(msg.body)
+                notification_id = msg.body[1]
+                if not notification_id:
+                    notification_id, next_id = next_id, next_id + 1
+                conn.send(new_method_return(msg, "u", (notification_id,)))
+
+
+def self_check():
+    """Notify against a private bus: arguments, shared ids, persisted ids"""
+    import importlib.util
+    import subprocess
+    import tempfile
+    import threading
+
+    if importlib.util.find_spec("jeepney") is None:
+        print("❌ python-jeepney is not installed")
+        return False
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config = os.path.join(tmp, "bus.conf")
+        with open(config, "w") as f:
+            f.write(BUS_CONFIG.format(path=os.path.join(tmp, "bus")))
+        daemon = subprocess.Popen(
+            ["dbus-daemon", f"--config-file={config}", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        address = daemon.stdout.readline().strip()
+        env = dict(os.environ, DBUS_SESSION_BUS_ADDRESS=address, XDG_RUNTIME_DIR=tmp)
+
+        calls = []
+        ready, stop = threading.Event(), threading.Event()
+        stub = threading.Thread(target=serve_stub, args=(address, calls, ready, stop))
+        stub.start()
+        ready.wait(5)
+
+        def send(channel, **options):
+            """notify() in a separate process, like two runs of a script"""
+            code = (
+                "import sys, desktop_notify; "
+                f"sys.exit(0 if desktop_notify.notify('Body', 'Title', "
+                f"channel={channel!r}, **{options!r}) else 1)"
+            )
+            subprocess.run(
+                [sys.executable, "-c", code],
+                env=env,
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                check=True,
+            )
+
+        try:
+            send("check", progress=50, urgency=2, timeout=1500)
+            send("check")
+            send("other")
+            with open(os.path.join(tmp, "choso", "notify-ids"), "r") as f:
+                saved = f.read()
+        except (OSError, subprocess.CalledProcessError) as e:
+            failures.append(f"sending failed: {e}")
+            saved = ""
+        finally:
+            stop.set()
+            stub.join()
+            daemon.terminate()
+            daemon.wait()
+
+    expected = [
+        (APP_NAME, 0, "dialog-information", "Title", "Body", [],
+         {"value": ("i", 50), "urgency": ("y", 2)}, 1500),
+        (APP_NAME, 41, "dialog-information", "Title", "Body", [], {}, 3000),
+        (APP_NAME, 0, "dialog-information", "Title", "Body", [], {}, 3000),
+    ]
+    if len(calls) != len(expected):
+        failures.append(f"expected {len(expected)} Notify calls, got {len(calls)}")
+    for number, (call, wanted) in enumerate(zip(calls, expected), 1):
+        if tuple(call) != wanted:
+            failures.append(f"Notify call {number}: {call} != {wanted}")
+    if sorted(saved.split()) != ["check=41", "other=42"]:
+        failures.append(f"persisted ids: {saved.split()}")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Notify arguments, shared replace ids and persisted ids")
+    return not failures
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--check"]:
+        sys.exit(0 if self_check() else 1)
+    print(__doc__.strip().split("Usage:")[1])
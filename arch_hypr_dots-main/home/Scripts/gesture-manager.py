@@ -5,10 +5,9 @@ Handles multi-finger gestures and touch input
 """
 
 import subprocess
-import json
 import sys
-import time
-from threading import Thread
+
+import desktop_notify
 
 class GestureManager:
     def __init__(self):
@@ -51,13 +50,9 @@ class GestureManager:
     
     def notify(self, message, title="Gesture"):
         """Send notification"""
-        try:
-            subprocess.run([
-                "notify-send", "-i", "input-touchpad", "-t", "1000", 
-                title, message
-            ], check=False)
-        except:
-            pass
+        desktop_notify.notify(
+            message, title, icon="input-touchpad", timeout=1000, channel="gesture"
+        )
     
     # ========== 3-FINGER GESTURES (Window Management) ==========
     def cycle_windows_forward(self):
@@ -108,6 +103,7 @@ class GestureManager:
     def minimize_all(self):
         """4-finger swipe down: Show desktop (minimize all)"""
         # Get all windows and minimize them
+        import json
         try:
             result = subprocess.run(["hyprctl", "clients", "-j"], capture_output=True, text=True)
             clients = json.loads(result.stdout)
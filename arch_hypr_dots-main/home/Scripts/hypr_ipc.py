@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Hyprland IPC
+Minimal client for Hyprland's request socket (.socket.sock) shared by the
+~/Scripts tools, plus a fake server that speaks the same protocol so the
+tools can be exercised without a running compositor.
+
+The socket is located from HYPRLAND_INSTANCE_SIGNATURE and XDG_RUNTIME_DIR,
+so pointing both at a directory served by FakeHyprServer is enough.
+
+Usage:
+  hypr_ipc.py --fake-server runtime_dir [signature]
+"""
+
+import json
+import os
+import socket
+import sys
+
+FAKE_SIGNATURE = "choso-fake"
+
+
+def instance_dir():
+    """Directory holding the sockets of the current Hyprland instance"""
+    signature = os.environ.get("HYPRLAND_INSTANCE_SIGNATURE")
+    if not signature:
+        return None
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/run/user/{os.getuid()}")
+    path = os.path.join(runtime_dir, "hypr", signature)
+    if os.path.isdir(path):
+        return path
+    # Hyprland before 0.40 kept its sockets in /tmp
+    return os.path.join("/tmp", "hypr", signature)
+
+
+def socket_path(name=".socket.sock"):
+    directory = instance_dir()
+    return os.path.join(directory, name) if directory else None
+
+
+def request(command, timeout=2.0):
+    """Send one request and return the reply text"""
+    path = socket_path()
+    if path is None:
+        raise ConnectionError("not running inside Hyprland")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(timeout)
+        conn.connect(path)
+        conn.sendall(command.encode())
+        chunks = []
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks).decode("utf-8", "replace")
+
+
+def batch(commands):
+    """Run several commands ("keyword a b", "dispatch x") in one request"""
+    return request("[[BATCH]]" + ";".join(commands))
+
+
+def query(name):
+    """JSON reply of a query such as "clients" or "monitors" """
+    return json.loads(request(f"j/{name}"))
+
+
+def compositor_pid(proc_root="/proc"):
+    """PID of the running Hyprland process, or None"""
+    try:
+        entries = os.listdir(proc_root)
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(os.path.join(proc_root, entry, "comm"), "r") as f:
+                if f.read().strip() == "Hyprland":
+                    return int(entry)
+        except OSError:
+            continue
+    return None
+
+
+def process_cpu_ticks(pid, proc_root="/proc"):
+    """utime + stime of a process in clock ticks"""
+    with open(os.path.join(proc_root, str(pid), "stat"), "r") as f:
+        # The command name may contain spaces, fields resume after the last ")"
+        fields = f.read().rpartition(")")[2].split()
+    return int(fields[11]) + int(fields[12])
+
+
+class FakeHyprServer:
+    """Stand-in for Hyprland's request socket
+
+    Tracks keywords, windows and the active workspace and answers the
+    queries the tools use. It renders nothing, so it checks that a tool
+    drives the protocol correctly, not what its requests would cost.
+    """
+
+    def __init__(self, runtime_dir, signature=FAKE_SIGNATURE):
+        self.directory = os.path.join(runtime_dir, "hypr", signature)
+        self.path = os.path.join(self.directory, ".socket.sock")
+        self.keywords = {}
+        self.windows = []
+        self.workspace = 1
+        self.next_address = 0x1000
+
+    def find(self, selector):
+        """First window matching "address:0x..." or "class:name", or None"""
+        kind, _, value = selector.partition(":")
+        for window in self.windows:
+            if kind in ("address", "class") and window[kind] == value:
+                return window
+        return None
+
+    def dispatch(self, args):
+        name, _, rest = args.partition(" ")
+        if name == "exec":
+            self.windows.append(
+                {
+                    "address": hex(self.next_address),
+                    "class": rest.split()[-1] if rest else "",
+                    "title": rest,
+                    "workspace": {"id": self.workspace},
+                    "at": [0, 0],
+                    "size": [640, 480],
+                }
+            )
+            self.next_address += 0x10
+        elif name == "workspace" and rest.isdigit():
+            self.workspace = int(rest)
+        elif name in ("movewindowpixel", "resizewindowpixel"):
+            delta, _, selector = rest.partition(",")
+            window = self.find(selector)
+            if window is None:
+                return "window not found"
+            key = "at" if name == "movewindowpixel" else "size"
+            dx, dy = (int(x) for x in delta.split())
+            window[key] = [window[key][0] + dx, window[key][1] + dy]
+        elif name == "closewindow":
+            # Like Hyprland, only the first matching window is closed
+            window = self.find(rest)
+            if window is None:
+                return "window not found"
+            self.windows.remove(window)
+        return "ok"
+
+    def handle(self, command):
+        if command.startswith("[[BATCH]]"):
+            return "\n\n".join(
+                self.handle(part.strip())
+                for part in command[len("[[BATCH]]") :].split(";")
+                if part.strip()
+            )
+
+        flags = ""
+        if "/" in command.split(" ", 1)[0]:
+            flags, command = command.split("/", 1)
+        verb, _, args = command.partition(" ")
+        if verb == "keyword":
+            name, _, value = args.partition(" ")
+            self.keywords[name] = value.strip()
+            return "ok"
+        if verb == "dispatch":
+            return self.dispatch(args)
+
+        replies = {
+            "clients": self.windows,
+            "activeworkspace": {"id": self.workspace},
+            "monitors": [{"id": 0, "name": "FAKE-1", "width": 1920, "height": 1080}],
+            "version": {"tag": "fake"},
+        }
+        if verb not in replies:
+            return "unknown request"
+        return json.dumps(replies[verb]) if "j" in flags else str(replies[verb])
+
+    def serve_forever(self):
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        listener.listen(16)
+        try:
+            while True:
+                conn, _ = listener.accept()
+                with conn:
+                    data = conn.recv(65536)
+                    if data:
+                        reply = self.handle(data.decode("utf-8", "replace"))
+                        conn.sendall(reply.encode())
+        finally:
+            listener.close()
+            os.unlink(self.path)
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--fake-server":
+        signature = sys.argv[3] if len(sys.argv) > 3 else FAKE_SIGNATURE
+        try:
+            FakeHyprServer(sys.argv[2], signature).serve_forever()
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(__doc__.strip().split("Usage:")[1])
+
+
+if __name__ == "__main__":
+    main()
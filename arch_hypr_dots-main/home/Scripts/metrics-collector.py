@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Metrics Collector
+Samples CPU, GPU, memory, disk, network, temperature and power once per
+interval into the shared ring buffer (metrics_ring.py), so system-info, the
+banner and performance-manager can show current numbers without sampling or
+blocking. Every sample is also rolled up into the long-term history
+(metrics_history.py). Started from hyprland.conf with exec-once.
+
+Usage:
+  metrics-collector.py [interval]
+  metrics-collector.py --latest
+"""
+
+import os
+import signal
+import sys
+import time
+
+import metrics_history
+import metrics_ring
+from proc_metrics import (
+    GpuMonitor,
+    NetworkMonitor,
+    ProcFile,
+    SensorRegistry,
+    busy_percent,
+    filesystem_usage,
+    parse_cpu_times,
+    parse_meminfo,
+    read_power_supply,
+)
+
+
+class MetricsCollector:
+    def __init__(self, interval=1.0, slots=600, proc_root="/proc", sys_root="/sys"):
+        self.interval = interval
+        self.slots = slots
+        self.sys_root = sys_root
+        self.stat = ProcFile(os.path.join(proc_root, "stat"))
+        self.meminfo = ProcFile(os.path.join(proc_root, "meminfo"))
+        self.loadavg = ProcFile(os.path.join(proc_root, "loadavg"))
+        self.network = NetworkMonitor(proc_root)
+        self.network.update()
+        self.freq_files = self.open_freq_files()
+        self.sensors = SensorRegistry(sys_root)
+        self.gpus = GpuMonitor(sys_root)
+        self.previous = parse_cpu_times(self.stat.read())
+
+        self.cores = sorted(
+            (name for name in self.previous if name != "cpu"), key=lambda n: int(n[3:])
+        )
+        self.fields = (
+            ["time", "cpu"]
+            + self.cores
+            + [
+                "cpu_freq",
+                "load1",
+                "mem_percent",
+                "mem_used",
+                "mem_total",
+                "swap_used",
+                "swap_total",
+                "disk_percent",
+                "disk_used",
+                "disk_total",
+                "temp",
+                "battery",
+                "ac",
+                "net_rx",
+                "net_tx",
+                "gpu_busy",
+                "gpu_freq",
+                "gpu_vram_used",
+                "gpu_temp",
+                "gpu_power",
+            ]
+        )
+
+    def open_freq_files(self):
+        """scaling_cur_freq of every cpufreq policy, kept open"""
+        base = os.path.join(self.sys_root, "devices", "system", "cpu", "cpufreq")
+        files = []
+        try:
+            policies = sorted(os.listdir(base))
+        except OSError:
+            return files
+        for policy in policies:
+            try:
+                files.append(ProcFile(os.path.join(base, policy, "scaling_cur_freq")))
+            except OSError:
+                continue
+        return files
+
+    def cpu_freq(self):
+        """Average current frequency in MHz"""
+        values = []
+        for freq_file in self.freq_files:
+            try:
+                values.append(int(freq_file.read()) / 1000)
+            except (OSError, ValueError):
+                continue
+        return sum(values) / len(values) if values else None
+
+    def network_rates(self):
+        """Received and sent bytes/s over all interfaces but loopback"""
+        interfaces = self.network.update()
+        return (
+            sum(interface["rx"] for interface in interfaces),
+            sum(interface["tx"] for interface in interfaces),
+        )
+
+    def sample(self):
+        """One sample dict with every field of the ring"""
+        current = parse_cpu_times(self.stat.read())
+        sample = {"time": time.time()}
+        for name in ["cpu"] + self.cores:
+            if name in current and name in self.previous:
+                sample[name] = busy_percent(self.previous[name], current[name])
+        self.previous = current
+
+        sample["cpu_freq"] = self.cpu_freq()
+        sample["load1"] = float(self.loadavg.read().split()[0])
+
+        meminfo = parse_meminfo(self.meminfo.read())
+        total = meminfo.get("MemTotal", 0) * 1024
+        available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0)) * 1024
+        sample["mem_total"] = total
+        sample["mem_used"] = total - available
+        sample["mem_percent"] = 100 * (total - available) / total if total else None
+        sample["swap_total"] = meminfo.get("SwapTotal", 0) * 1024
+        sample["swap_used"] = sample["swap_total"] - meminfo.get("SwapFree", 0) * 1024
+
+        try:
+            disk = filesystem_usage("/")
+            sample["disk_total"] = disk["total"]
+            sample["disk_used"] = disk["used"]
+            sample["disk_percent"] = disk["percent"] if disk["total"] else None
+        except OSError:
+            pass
+
+        sample["temp"] = self.sensors.cpu_temperature()
+        power = read_power_supply(self.sys_root)
+        sample["battery"] = power["battery"]
+        sample["ac"] = None if power["ac"] is None else float(power["ac"])
+        sample["net_rx"], sample["net_tx"] = self.network_rates()
+
+        gpu = self.gpus.primary() or {}
+        for metric in ("busy", "freq", "vram_used", "temp", "power"):
+            sample[f"gpu_{metric}"] = gpu.get(metric)
+        return sample
+
+    def run(self):
+        """Sample forever on a fixed schedule"""
+        writer = metrics_ring.RingWriter(self.fields, self.slots, self.interval)
+        history = metrics_history.HistoryRecorder(self.cores)
+        print(f"📈 Collecting {len(self.fields)} metrics every {self.interval}s")
+        print(f"   Ring: {writer.path}")
+        print(f"   History: {metrics_history.HISTORY_DIR}")
+
+        # Logout and systemd stop with SIGTERM/SIGHUP: leave through the finally
+        # below so the partial history periods are written, not lost
+        for signum in (signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, lambda *_: sys.exit(0))
+
+        deadline = time.monotonic()
+        try:
+            while True:
+                deadline += self.interval
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Fell behind (suspend, heavy load): restart the schedule
+                    deadline = time.monotonic()
+                sample = self.sample()
+                writer.append(sample)
+                history.add(sample)
+        except KeyboardInterrupt:
+            print("\n👋 Collector stopped")
+        finally:
+            writer.close()
+            history.close()
+
+
+def show_latest():
+    sample = metrics_ring.latest()
+    if sample is None:
+        print("❌ No running collector (start metrics-collector.py)")
+        return 1
+    for name, value in sample.items():
+        print(f"{name:<14}{'N/A' if value is None else round(value, 2)}")
+    return 0
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--latest":
+        sys.exit(show_latest())
+    elif len(sys.argv) > 1 and not sys.argv[1].replace(".", "", 1).isdigit():
+        print(__doc__.strip().split("Usage:")[1])
+    else:
+        interval = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+        MetricsCollector(interval).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Metrics Exporter
+Publishes the collector's latest sample and the current performance mode in
+the Prometheus text format, over HTTP on a UNIX or TCP socket (OpenMetrics
+for scrapers that ask for it) and as a textfile for node_exporter's textfile
+collector. Every scrape only reads the ring buffer filled by
+metrics-collector.py, so it never waits on sampling.
+
+Usage:
+  metrics-exporter.py [--listen unix:PATH|HOST:PORT] [--textfile PATH]
+                      [--interval seconds]
+  metrics-exporter.py --once
+"""
+
+import os
+import sys
+import threading
+import time
+
+import metrics_ring
+from proc_metrics import runtime_file
+
+MODE_FILE = os.path.expanduser("~/.config/hypr/performance_mode")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# (ring field, metric name, type, help, scale)
+FIELD_METRICS = [
+    ("cpu", "choso_cpu_usage_percent", "gauge", "Total CPU busy time", 1),
+    ("cpu_freq", "choso_cpu_frequency_hertz", "gauge", "Average CPU frequency", 1e6),
+    ("load1", "choso_load1", "gauge", "One minute load average", 1),
+    ("mem_used", "choso_memory_used_bytes", "gauge", "Memory in use", 1),
+    ("mem_total", "choso_memory_total_bytes", "gauge", "Installed memory", 1),
+    ("swap_used", "choso_swap_used_bytes", "gauge", "Swap in use", 1),
+    ("swap_total", "choso_swap_total_bytes", "gauge", "Swap size", 1),
+    ("disk_used", "choso_root_disk_used_bytes", "gauge", "Used space on /", 1),
+    ("disk_total", "choso_root_disk_total_bytes", "gauge", "Size of /", 1),
+    ("temp", "choso_cpu_temperature_celsius", "gauge", "CPU temperature", 1),
+    ("battery", "choso_battery_percent", "gauge", "Battery charge", 1),
+    ("ac", "choso_ac_online", "gauge", "Whether mains power is connected", 1),
+    ("net_rx", "choso_network_receive_bytes_per_second", "gauge", "Received over all interfaces", 1),
+    ("net_tx", "choso_network_transmit_bytes_per_second", "gauge", "Sent over all interfaces", 1),
+    ("gpu_busy", "choso_gpu_usage_percent", "gauge", "Busy time of the primary GPU", 1),
+    ("gpu_freq", "choso_gpu_frequency_hertz", "gauge", "Primary GPU core clock", 1e6),
+    ("gpu_vram_used", "choso_gpu_vram_used_bytes", "gauge", "Primary GPU memory in use", 1),
+    ("gpu_temp", "choso_gpu_temperature_celsius", "gauge", "Primary GPU temperature", 1),
+    ("gpu_power", "choso_gpu_power_watts", "gauge", "Primary GPU power draw", 1),
+]
+
+
+def escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def number(value):
+    """Integral values (byte counts) exactly, others with full precision"""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def current_mode():
+    try:
+        with open(MODE_FILE, "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def render(sample=None, mode=None, openmetrics=False):
+    """Exposition of one sample and the performance mode
+
+    Prometheus text format by default; openmetrics=True adds the "# EOF"
+    terminator OpenMetrics requires (and the textfile collector rejects).
+    """
+    lines = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    family(
+        "choso_collector_up",
+        "gauge",
+        "Whether metrics-collector.py is running",
+        [f"choso_collector_up {1 if sample else 0}"],
+    )
+
+    if sample:
+        family(
+            "choso_sample_timestamp_seconds",
+            "gauge",
+            "Time the exported sample was taken",
+            [f"choso_sample_timestamp_seconds {sample['time']:.3f}"],
+        )
+        for field, name, kind, help_text, scale in FIELD_METRICS:
+            value = sample.get(field)
+            if value is not None:
+                family(name, kind, help_text, [f"{name} {number(value * scale)}"])
+
+        cores = metrics_ring.core_usage(sample)
+        family(
+            "choso_cpu_core_usage_percent",
+            "gauge",
+            "Busy time per CPU core",
+            [
+                f'choso_cpu_core_usage_percent{{core="{i}"}} {number(value)}'
+                for i, value in enumerate(cores)
+                if value is not None
+            ],
+        )
+
+    if mode:
+        family(
+            "choso_performance_mode",
+            "gauge",
+            "Active performance-manager.py mode",
+            [f'choso_performance_mode{{mode="{escape(mode)}"}} 1'],
+        )
+
+    if openmetrics:
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def exposition(openmetrics=False):
+    return render(metrics_ring.latest(), current_mode(), openmetrics)
+
+
+def write_textfile(path):
+    """Replace the textfile atomically so node_exporter never reads half of it"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}"
+    with open(tmp, "w") as f:
+        f.write(exposition())
+    os.replace(tmp, path)
+
+
+def textfile_loop(path, interval):
+    while True:
+        try:
+            write_textfile(path)
+        except OSError as e:
+            print(f"⚠️ Cannot write {path}: {e}")
+        time.sleep(interval)
+
+
+def make_server(listen):
+    """HTTP server for "unix:/path" or "host:port" """
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get(
+                "Accept", ""
+            )
+            body = exposition(openmetrics).encode()
+            self.send_response(200)
+            self.send_header(
+                "Content-Type", OPENMETRICS_TYPE if openmetrics else CONTENT_TYPE
+            )
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    if listen.startswith("unix:"):
+        path = listen[len("unix:") :]
+
+        class UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+            def get_request(self):
+                # BaseHTTPRequestHandler expects an (address, port) pair
+                conn, _ = super().get_request()
+                return conn, ("local", 0)
+
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        return UnixServer(path, Handler)
+
+    host, _, port = listen.rpartition(":")
+    return ThreadingHTTPServer((host or "127.0.0.1", int(port)), Handler)
+
+
+def main():
+    args = sys.argv[1:]
+    if "--once" in args:
+        sys.stdout.write(exposition())
+        return
+    options = ("--listen", "--textfile", "--interval")
+    if any(arg.startswith("--") and arg not in options for arg in args):
+        print(__doc__.strip().split("Usage:")[1])
+        return
+
+    listen = f"unix:{runtime_file('metrics.sock')}"
+    textfile = runtime_file("choso.prom")
+    interval = 15.0
+    if "--listen" in args:
+        listen = args[args.index("--listen") + 1]
+    if "--textfile" in args:
+        textfile = args[args.index("--textfile") + 1]
+    if "--interval" in args:
+        interval = float(args[args.index("--interval") + 1])
+
+    threading.Thread(
+        target=textfile_loop, args=(textfile, interval), daemon=True
+    ).start()
+
+    server = make_server(listen)
+    print(f"📤 Serving metrics on {listen}, textfile {textfile}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Exporter stopped")
+    finally:
+        server.server_close()
+        if listen.startswith("unix:"):
+            try:
+                os.unlink(listen[len("unix:") :])
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
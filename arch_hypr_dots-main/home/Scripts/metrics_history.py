@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Metrics History
+Long-term history of the collector's samples in three memory-mapped rings
+(metrics_ring.py format) under ~/.local/share/choso/history:
+
+  raw   10 second averages for a day
+  1m    1 minute averages for a week
+  1h    1 hour averages for a year
+
+Every record is fixed width (one double per field), so each tier has a
+fixed size and the whole store stays at a few MB however long it runs.
+metrics-collector.py feeds every sample to a HistoryRecorder, which keeps
+running sums per tier and appends one record when a period ends. Each
+record also counts the samples in it, so a restarted collector merges into
+the period it left off in instead of recording that period twice. Queries
+pick the finest tier that covers the span and only read the slots they
+need from the map.
+"""
+
+import os
+import time
+
+import metrics_ring
+
+HISTORY_DIR = os.path.expanduser("~/.local/share/choso/history")
+
+# (name, seconds per record, records kept)
+TIERS = [
+    ("raw", 10, 8640),
+    ("1m", 60, 10080),
+    ("1h", 3600, 8760),
+]
+
+# Sample fields kept in the history besides the per-core usage
+AVERAGED = ["cpu", "mem_percent", "temp", "battery"]
+# Fields that also get their peak within the period
+PEAKS = ["cpu", "temp"]
+
+SPARK = "▁▂▃▄▅▆▇█"
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def history_fields(cores):
+    return (
+        ["time", "samples"] + AVERAGED + [f"{name}_max" for name in PEAKS] + list(cores)
+    )
+
+
+def tier_path(name, directory=None):
+    return os.path.join(directory or HISTORY_DIR, f"{name}.ring")
+
+
+def parse_span(text):
+    """Seconds in "90s", "30m", "1h", "7d" or "2w" """
+    text = text.strip().lower()
+    if text[-1:] in UNITS:
+        return float(text[:-1]) * UNITS[text[-1]]
+    return float(text)
+
+
+class Period:
+    """Running sums for the period of one tier that is being filled"""
+
+    def __init__(self, fields):
+        skip = {"time", "samples"} | {f"{name}_max" for name in PEAKS}
+        self.fields = [name for name in fields if name not in skip]
+        self.reset(None)
+
+    def reset(self, start):
+        self.start = start
+        self.samples = 0
+        self.sums = dict.fromkeys(self.fields, 0.0)
+        self.counts = dict.fromkeys(self.fields, 0)
+        self.peaks = {}
+        # Whether the newest slot of the tier already holds this period
+        self.stored = False
+
+    def resume(self, record):
+        """Continue from a stored partial record, weighted by its samples"""
+        self.reset(record["time"])
+        self.samples = int(record.get("samples") or 1)
+        for name in self.fields:
+            value = record.get(name)
+            if value is not None:
+                self.sums[name] = value * self.samples
+                self.counts[name] = self.samples
+        for name in PEAKS:
+            value = record.get(f"{name}_max")
+            if value is not None:
+                self.peaks[name] = value
+        self.stored = True
+
+    def add(self, sample):
+        self.samples += 1
+        for name in self.fields:
+            value = sample.get(name)
+            if value is not None:
+                self.sums[name] += value
+                self.counts[name] += 1
+        for name in PEAKS:
+            value = sample.get(name)
+            if value is not None and (name not in self.peaks or value > self.peaks[name]):
+                self.peaks[name] = value
+
+    def record(self):
+        record = {"time": self.start, "samples": self.samples}
+        for name in self.fields:
+            if self.counts[name]:
+                record[name] = self.sums[name] / self.counts[name]
+        for name, value in self.peaks.items():
+            record[f"{name}_max"] = value
+        return record
+
+
+class HistoryRecorder:
+    """Rolls collector samples up into every tier"""
+
+    def __init__(self, cores, directory=None):
+        self.fields = history_fields(cores)
+        self.tiers = []
+        for name, seconds, slots in TIERS:
+            writer = metrics_ring.RingWriter(
+                self.fields, slots, seconds, tier_path(name, directory), reuse=True
+            )
+            period = Period(self.fields)
+            latest = self.latest(writer)
+            if latest and latest.get("time") is not None:
+                if latest["time"] + seconds > time.time():
+                    # Restarted within the period a flush already stored
+                    period.resume(latest)
+            self.tiers.append((seconds, writer, period))
+
+    @staticmethod
+    def latest(writer):
+        if not writer.written:
+            return None
+        reader = metrics_ring.RingReader(writer.path)
+        try:
+            return reader.latest()
+        finally:
+            reader.close()
+
+    def store(self, writer, period):
+        if period.stored:
+            writer.replace_last(period.record())
+        else:
+            writer.append(period.record())
+            period.stored = True
+
+    def add(self, sample):
+        now = sample["time"]
+        for seconds, writer, period in self.tiers:
+            start = now - now % seconds
+            if period.start != start:
+                if period.start is not None:
+                    self.store(writer, period)
+                period.reset(start)
+            period.add(sample)
+
+    def flush(self):
+        """Store the partial periods, e.g. when the collector stops
+
+        The periods stay open, so samples added afterwards (or a final
+        flush from close()) rewrite the same records instead of adding
+        new ones.
+        """
+        for _, writer, period in self.tiers:
+            if period.start is not None and any(period.counts.values()):
+                self.store(writer, period)
+
+    def close(self):
+        self.flush()
+        for _, writer, _ in self.tiers:
+            writer.close()
+
+
+def query(span, directory=None, now=None):
+    """(tier name, seconds per record, records) covering the last span seconds
+
+    Uses the finest tier that keeps that much history and reads only the
+    newest span / resolution slots of it.
+    """
+    now = now or time.time()
+    for name, seconds, slots in TIERS:
+        if span <= seconds * slots or name == TIERS[-1][0]:
+            try:
+                reader = metrics_ring.RingReader(tier_path(name, directory))
+            except (OSError, ValueError):
+                continue
+            try:
+                records = reader.history(int(span // seconds) + 1)
+            finally:
+                reader.close()
+            records = [r for r in records if (r.get("time") or 0) >= now - span]
+            if records or name == TIERS[-1][0]:
+                return name, seconds, records
+    return None, None, []
+
+
+def columns(records, field, start, span, width):
+    """Average of field per column, placing records by time so gaps show"""
+    sums, counts = [0.0] * width, [0] * width
+    for record in records:
+        value = record.get(field)
+        if value is None:
+            continue
+        column = int((record["time"] - start) * width / span)
+        if 0 <= column < width:
+            sums[column] += value
+            counts[column] += 1
+    return [sums[i] / counts[i] if counts[i] else None for i in range(width)]
+
+
+def sparkline(values, low=None, high=None):
+    """Block characters scaled between low and high; None stays blank"""
+    known = [v for v in values if v is not None]
+    if not known:
+        return " " * len(values)
+    low = min(known) if low is None else low
+    high = max(known) if high is None else high
+    scale = (len(SPARK) - 1) / (high - low) if high > low else 0
+    return "".join(
+        " "
+        if v is None
+        else SPARK[max(0, min(len(SPARK) - 1, round((v - low) * scale)))]
+        for v in values
+    )
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Metrics Ring Buffer
+Fixed-size ring of metric samples in a memory-mapped file under
+$XDG_RUNTIME_DIR/choso. metrics-collector.py is the only writer; the info
+scripts map the file read-only and pick up the latest sample or recent
+history without sampling anything themselves.
+
+Layout (native byte order):
+  header  magic, version, slot count, field count, names size, interval,
+          samples written
+  names   comma separated field names, so readers look fields up by name,
+          padded so the slots start 8 byte aligned
+  slots   per slot a sequence counter followed by one double per field
+
+Every slot is guarded by its own seqlock: the writer makes the counter odd,
+writes the values and makes it even again, and readers retry when the
+counter was odd or changed while they copied the values. Missing values are
+stored as NaN and read back as None.
+"""
+
+import mmap
+import os
+import struct
+import time
+
+from proc_metrics import runtime_file
+
+MAGIC = b"CHMR"
+VERSION = 2
+HEADER = struct.Struct("=4sIIIIdQ")
+SEQUENCE = struct.Struct("=Q")
+WRITTEN_OFFSET = HEADER.size - 8
+NAN = float("nan")
+
+
+def ring_path():
+    return runtime_file("metrics.ring")
+
+
+class RingWriter:
+    """Creates the ring file and appends samples to it"""
+
+    def __init__(self, fields, slots=600, interval=1.0, path=None, reuse=False):
+        """Create a new ring, or with reuse=True continue a compatible one"""
+        self.path = path or ring_path()
+        self.fields = list(fields)
+        self.slots = slots
+        self.values = struct.Struct(f"={len(self.fields)}d")
+        self.slot_size = SEQUENCE.size + self.values.size
+        self.written = 0
+
+        names = ",".join(self.fields).encode()
+        # Sized for the fields, so machines with many cores fit
+        self.data_offset = -(-(HEADER.size + len(names)) // 8) * 8
+        names_size = self.data_offset - HEADER.size
+
+        if reuse and self.reopen():
+            return
+
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        # Build the file aside so readers never map a half initialised ring
+        tmp = f"{self.path}.{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC, VERSION, slots, len(self.fields), names_size, interval, 0
+                )
+            )
+            f.write(names.ljust(names_size, b"\0"))
+            f.truncate(self.data_offset + slots * self.slot_size)
+        os.replace(tmp, self.path)
+
+        self.file = open(self.path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+    def reopen(self):
+        """Map an existing ring with the same fields and size, keeping its data"""
+        try:
+            reader = RingReader(self.path)
+        except (OSError, ValueError):
+            return False
+        compatible = reader.fields == self.fields and reader.slots == self.slots
+        written = reader.written()
+        reader.close()
+        if not compatible:
+            return False
+
+        self.file = open(self.path, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.written = written
+        return True
+
+    def append(self, sample):
+        """Store one sample (a dict keyed by field name) in the next slot"""
+        self.write_slot(self.written, sample)
+        self.written += 1
+        struct.pack_into("=Q", self.map, WRITTEN_OFFSET, self.written)
+
+    def replace_last(self, sample):
+        """Overwrite the newest slot, e.g. with a period that got more samples"""
+        if not self.written:
+            return self.append(sample)
+        self.write_slot(self.written - 1, sample)
+
+    def write_slot(self, index, sample):
+        """Write one sample into the slot of index under its seqlock"""
+        offset = self.data_offset + (index % self.slots) * self.slot_size
+        (sequence,) = SEQUENCE.unpack_from(self.map, offset)
+        SEQUENCE.pack_into(self.map, offset, sequence + 1)
+        self.values.pack_into(
+            self.map,
+            offset + SEQUENCE.size,
+            *(
+                NAN if sample.get(name) is None else float(sample[name])
+                for name in self.fields
+            ),
+        )
+        SEQUENCE.pack_into(self.map, offset, sequence + 2)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+class RingReader:
+    """Read-only view of the ring; raises OSError/ValueError if it is unusable"""
+
+    def __init__(self, path=None):
+        with open(path or ring_path(), "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            slots,
+            field_count,
+            names_size,
+            interval,
+            _,
+        ) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError("not a metrics ring")
+
+        self.data_offset = HEADER.size + names_size
+        names = self.map[HEADER.size : self.data_offset].rstrip(b"\0").decode()
+        self.fields = names.split(",")[:field_count]
+        self.slots = slots
+        self.interval = interval
+        self.values = struct.Struct(f"={field_count}d")
+        self.slot_size = SEQUENCE.size + self.values.size
+
+    def written(self):
+        """Number of samples written since the collector started"""
+        return struct.unpack_from("=Q", self.map, WRITTEN_OFFSET)[0]
+
+    def read_slot(self, index, retries=100):
+        """Values of one slot, or None if the writer kept overwriting it"""
+        offset = self.data_offset + (index % self.slots) * self.slot_size
+        for _ in range(retries):
+            (before,) = SEQUENCE.unpack_from(self.map, offset)
+            if before & 1:
+                continue
+            values = self.values.unpack_from(self.map, offset + SEQUENCE.size)
+            (after,) = SEQUENCE.unpack_from(self.map, offset)
+            if before == after:
+                return dict(
+                    zip(self.fields, (None if v != v else v for v in values))
+                )
+        return None
+
+    def latest(self):
+        written = self.written()
+        return self.read_slot(written - 1) if written else None
+
+    def history(self, count):
+        """Up to count most recent samples, oldest first"""
+        written = self.written()
+        first = max(0, written - min(count, self.slots))
+        samples = (self.read_slot(index) for index in range(first, written))
+        return [sample for sample in samples if sample]
+
+    def close(self):
+        self.map.close()
+
+
+def core_fields(sample):
+    """Names of the per-core usage fields (cpu0, cpu1, ...), in core order"""
+    cores = [name for name in sample if name[:3] == "cpu" and name[3:].isdigit()]
+    return sorted(cores, key=lambda n: int(n[3:]))
+
+
+def core_usage(sample):
+    """Per-core usage values of a sample, in core order"""
+    return [sample[name] for name in core_fields(sample)]
+
+
+def latest(max_age=None, path=None):
+    """Newest sample, or None when no collector is running"""
+    try:
+        reader = RingReader(path)
+    except (OSError, ValueError):
+        return None
+    try:
+        sample = reader.latest()
+        limit = max_age if max_age is not None else 3 * reader.interval + 1
+    finally:
+        reader.close()
+
+    # A dead collector leaves its last sample behind
+    if not sample or time.time() - (sample.get("time") or 0) > limit:
+        return None
+    return sample
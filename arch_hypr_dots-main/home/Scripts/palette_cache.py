@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Pywal Palette Cache
+Colour schemes generated by pywal, stored under ~/.cache/choso/palettes by
+the blake2b hash of the image content, so a wallpaper that was used before
+(under any name) is themed with `wal -f <scheme>` instead of decoding and
+quantising the image again. Digests are remembered per path, size and
+mtime, so unchanged files are not re-read either. The cache keeps the most
+recently used MAX_PALETTES schemes; a hit refreshes the scheme's mtime and
+the oldest ones are evicted, and digests of deleted images are forgotten.
+
+Used by wallpaper-switcher.py (which also fills it ahead of time with
+--precompute) and ~/.config/swww/change_wallpaper.py.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+
+CACHE_DIR = os.path.expanduser("~/.cache/choso/palettes")
+WAL_COLORS = os.path.expanduser("~/.cache/wal/colors.json")
+MAX_PALETTES = 200
+CHUNK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """blake2b hex digest of a file's content"""
+    digest = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(path, "rb", buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+class PaletteCache:
+    def __init__(self, directory=None, max_palettes=MAX_PALETTES):
+        self.directory = directory or CACHE_DIR
+        self.max_palettes = max_palettes
+        self.index_file = os.path.join(self.directory, "digests.json")
+        self.index = None
+
+    def load_index(self):
+        """{path: [size, mtime_ns, digest]} of images hashed before"""
+        if self.index is None:
+            try:
+                with open(self.index_file, "r") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                self.index = {}
+        return self.index
+
+    def prune_index(self):
+        """Forget the digests of images that no longer exist"""
+        index = self.load_index()
+        for path in [path for path in index if not os.path.exists(path)]:
+            del index[path]
+
+    def save_index(self):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self.index_file}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                json.dump(self.index, f)
+            os.replace(tmp, self.index_file)
+        except OSError:
+            pass
+
+    def digest(self, image_path, save=True):
+        """Content digest, re-hashing only when size or mtime changed
+
+        Pass save=False when hashing many images and call save_index()
+        once afterwards.
+        """
+        image_path = os.path.abspath(image_path)
+        stat = os.stat(image_path)
+        index = self.load_index()
+        known = index.get(image_path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        digest = file_digest(image_path)
+        index[image_path] = [stat.st_size, stat.st_mtime_ns, digest]
+        if save:
+            self.save_index()
+        return digest
+
+    def missing(self, images):
+        """The images (one per distinct content) without a cached scheme"""
+        pending = {}
+        for image in images:
+            try:
+                digest = self.digest(image, save=False)
+            except OSError:
+                continue
+            if digest not in pending and not os.path.exists(self.scheme_path(digest)):
+                pending[digest] = image
+        self.prune_index()
+        self.save_index()
+        return list(pending.values())
+
+    def scheme_path(self, digest):
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def lookup(self, image_path):
+        """Cached scheme file for the image, or None"""
+        path = self.scheme_path(self.digest(image_path))
+        return path if os.path.exists(path) else None
+
+    def write_scheme(self, path, colors):
+        # Readers (wal -f of another switch) never see a half written scheme
+        tmp = f"{path}.{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(colors, f, indent=4)
+        os.replace(tmp, path)
+
+    def store(self, image_path, colors):
+        """Save a pywal colour dict (colors.json format) for the image"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.scheme_path(self.digest(image_path))
+        self.write_scheme(path, colors)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Drop the least recently used schemes beyond max_palettes"""
+        try:
+            schemes = [
+                entry
+                for entry in os.scandir(self.directory)
+                if entry.name.endswith(".json") and entry.name != "digests.json"
+            ]
+        except OSError:
+            return 0
+        if len(schemes) <= self.max_palettes:
+            return 0
+        schemes.sort(key=lambda entry: entry.stat().st_mtime)
+        stale = schemes[: len(schemes) - self.max_palettes]
+        for entry in stale:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+        return len(stale)
+
+    def apply(self, image_path, quiet=True):
+        """Theme the desktop after the image; True when the cache was used
+
+        A hit runs `wal -f` on the stored scheme (pointed at the image's
+        current path); a miss, or a scheme that cannot be read, runs
+        `wal -i` and stores what it generated. Raises
+        subprocess.CalledProcessError when wal fails.
+        """
+        image_path = os.path.abspath(image_path)
+        flags = ["-q"] if quiet else []
+        scheme = self.lookup(image_path)
+        colors = None
+        if scheme:
+            try:
+                with open(scheme, "r") as f:
+                    colors = json.load(f)
+                if colors.get("wallpaper") != image_path:
+                    colors["wallpaper"] = image_path
+                    self.write_scheme(scheme, colors)
+                else:
+                    # Refreshes the mtime the eviction order uses
+                    os.utime(scheme)
+            except (OSError, ValueError, AttributeError):
+                # AttributeError: valid JSON that is not a colour dict
+                colors = None
+        if colors is not None:
+            subprocess.run(["wal", "-f", scheme] + flags, check=True)
+            return True
+
+        subprocess.run(["wal", "-i", image_path] + flags, check=True)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.scheme_path(self.digest(image_path, save=False))
+            tmp = f"{path}.{os.getpid()}"
+            shutil.copyfile(WAL_COLORS, tmp)
+            os.replace(tmp, path)
+            self.prune_index()
+            self.save_index()
+            self.evict()
+        except OSError:
+            pass
+        return False
+
+
+def lower_priority():
+    """Run the calling process only on otherwise idle CPU time
+
+    SCHED_IDLE also puts its disk reads in the idle I/O class.
+    """
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        os.nice(19)
+
+
+def generate(image_path):
+    """(image, pywal colour dict or None, error) — run in worker processes
+
+    Uses pywal's Python API so nothing is applied to the desktop.
+    """
+    try:
+        import pywal  # type: ignore # pylint: disable=import-error
+
+        return image_path, pywal.colors.get(image_path), None
+    except Exception as e:
+        return image_path, None, str(e) or type(e).__name__
+    except SystemExit as e:
+        # pywal exits instead of raising on images it cannot read
+        return image_path, None, f"pywal exited ({e.code})"
@@ -7,14 +7,38 @@ Toggle between different performance profiles for optimal experience
 import subprocess
 import json
 import os
+import re
 import sys
 
+import desktop_notify
+
+# Root-owned copy of cpufreq-helper.py, allowed through sudoers by post_install
+CPUFREQ_HELPER = "/usr/local/bin/choso-cpufreq-helper"
+
+
+class LazyHyprIpc:
+    """Import hypr_ipc (and socket with it) on first use, so paths that
+    never talk to Hyprland (--status, --help) don't pay for it"""
+    _module = None
+
+    def __getattr__(self, name):
+        if LazyHyprIpc._module is None:
+            import hypr_ipc as module
+
+            LazyHyprIpc._module = module
+        return getattr(LazyHyprIpc._module, name)
+
+hypr_ipc = LazyHyprIpc()
+
 class PerformanceManager:
     def __init__(self):
         self.config_file = os.path.expanduser("~/.config/hypr/performance_mode")
         self.current_mode = self.load_current_mode()
+        self.rules = ProfileRules(
+            os.path.expanduser("~/.config/hypr/performance_rules.json")
+        )
         
-        self.modes = {
+        builtin_modes = {
             "performance": {
                 "name": "🚀 Performance Mode",
                 "description": "Maximum performance for gaming and heavy tasks",
@@ -27,6 +51,11 @@ class PerformanceManager:
                     "gaps": 0,
                     "rounding": 0,
                     "border_size": 1
+                },
+                "cpu": {
+                    "governor": "performance",
+                    "epp": "performance",
+                    "turbo": True
                 }
             },
             "balanced": {
@@ -41,6 +70,11 @@ class PerformanceManager:
                     "gaps": 4,
                     "rounding": 8,
                     "border_size": 2
+                },
+                "cpu": {
+                    "governor": "schedutil,powersave",
+                    "epp": "balance_performance",
+                    "turbo": True
                 }
             },
             "beauty": {
@@ -55,6 +89,11 @@ class PerformanceManager:
                     "gaps": 10,
                     "rounding": 14,
                     "border_size": 2
+                },
+                "cpu": {
+                    "governor": "schedutil,powersave",
+                    "epp": "balance_performance",
+                    "turbo": True
                 }
             },
             "battery": {
@@ -69,9 +108,18 @@ class PerformanceManager:
                     "gaps": 2,
                     "rounding": 4,
                     "border_size": 1
+                },
+                "cpu": {
+                    "governor": "powersave,schedutil",
+                    "epp": "power",
+                    "max_freq": "70%",
+                    "turbo": False
                 }
             }
         }
+        self.modes = ModeConfig(
+            os.path.expanduser("~/.config/hypr/performance_modes"), builtin_modes
+        ).load()
     
     def load_current_mode(self):
         """Load current performance mode"""
@@ -90,80 +138,76 @@ class PerformanceManager:
         except Exception as e:
             print(f"❌ Failed to save mode: {e}")
     
-    def hypr_command(self, command):
-        """Execute Hyprland command"""
+    def hypr_batch(self, keywords):
+        """Set several Hyprland keywords in a single IPC request"""
+        if not keywords:
+            return True
         try:
-            subprocess.run(["hyprctl", "keyword", command], check=True)
+            hypr_ipc.batch(f"keyword {name} {value}" for name, value in keywords)
             return True
         except Exception as e:
-            print(f"❌ Error executing command '{command}': {e}")
+            print(f"❌ Error applying keywords: {e}")
             return False
     
+    def apply_cpu_policy(self, cpu):
+        """Apply a mode's CPU policy through the privileged helper
+
+        Modes without a "cpu" entry restore the values saved before the first
+        change. Every key is optional: governor (comma-separated preference
+        list), epp, min_freq/max_freq (kHz or "N%" of the hardware max) and
+        turbo.
+        """
+        if not os.path.exists(CPUFREQ_HELPER):
+            return False
+
+        if cpu:
+            args = ["apply"]
+            for key in ("governor", "epp", "min_freq", "max_freq"):
+                if cpu.get(key) is not None:
+                    args += [f"--{key.replace('_', '-')}", str(cpu[key])]
+            if cpu.get("turbo") is not None:
+                args += ["--turbo", "on" if cpu["turbo"] else "off"]
+        else:
+            args = ["restore"]
+
+        result = subprocess.run(
+            ["sudo", "-n", CPUFREQ_HELPER] + args, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"⚠️ CPU policy not fully applied: {(result.stdout + result.stderr).strip()}")
+        return result.returncode == 0
+
     def notify(self, message, title="Performance Manager"):
         """Send desktop notification"""
-        try:
-            subprocess.run([
-                "notify-send", "-i", "preferences-system-performance",
-                "-t", "4000", title, message
-            ], check=False)
-        except:
+        if not desktop_notify.notify(
+            message, title, icon="preferences-system-performance",
+            timeout=4000, channel="performance"
+        ):
             print(f"⚡ {title}: {message}")
     
-    def apply_mode(self, mode_name):
+    def apply_mode(self, mode_name, quiet=False):
         """Apply performance mode"""
         if mode_name not in self.modes:
             self.notify(f"❌ Unknown mode: {mode_name}", "Error")
             return False
         
         mode = self.modes[mode_name]
-        settings = mode["settings"]
-        
-        self.notify(f"🔄 Switching to {mode['name']}")
-        
-        # Apply animation settings
-        if settings["animations"]:
-            self.hypr_command("animations:enabled true")
-        else:
-            self.hypr_command("animations:enabled false")
-        
-        # Apply blur settings
-        if settings["blur"]:
-            self.hypr_command("decoration:blur:enabled true")
-            self.hypr_command("decoration:blur:size 2")
-            self.hypr_command("decoration:blur:passes 4")
-        else:
-            self.hypr_command("decoration:blur:enabled false")
         
-        # Apply shadow settings
-        if settings["shadows"]:
-            self.hypr_command("decoration:drop_shadow true")
-            self.hypr_command("decoration:shadow_range 4")
-            self.hypr_command("decoration:shadow_render_power 3")
-        else:
-            self.hypr_command("decoration:drop_shadow false")
-        
-        # Apply transparency settings
-        if settings["transparency"]:
-            self.hypr_command("decoration:active_opacity 0.95")
-            self.hypr_command("decoration:inactive_opacity 0.90")
-        else:
-            self.hypr_command("decoration:active_opacity 1.0")
-            self.hypr_command("decoration:inactive_opacity 1.0")
+        if not quiet:
+            self.notify(f"🔄 Switching to {mode['name']}")
         
-        # Apply VFR (Variable Frame Rate)
-        self.hypr_command(f"misc:vfr {str(settings['vfr']).lower()}")
+        # One hyprctl round trip for every keyword of the mode
+        self.hypr_batch(mode["keywords"])
         
-        # Apply visual settings
-        self.hypr_command(f"general:gaps_in {settings['gaps']}")
-        self.hypr_command(f"general:gaps_out {settings['gaps'] + 2}")
-        self.hypr_command(f"decoration:rounding {settings['rounding']}")
-        self.hypr_command(f"general:border_size {settings['border_size']}")
+        # Apply CPU frequency policy
+        self.apply_cpu_policy(mode.get("cpu"))
         
         # Save current mode
         self.current_mode = mode_name
         self.save_current_mode(mode_name)
         
-        self.notify(f"✅ {mode['name']} applied successfully!")
+        if not quiet:
+            self.notify(f"✅ {mode['name']} applied successfully!")
         return True
     
     def toggle_gaming_mode(self):
@@ -186,13 +230,13 @@ class PerformanceManager:
             )
             clients = json.loads(result.stdout)
             
-            # Check for gaming applications
-            gaming_apps = ["steam_app_", "lutris", "heroic", "minecraft", "wine"]
-            for client in clients:
-                class_name = client.get("class", "").lower()
-                if any(game_app in class_name for game_app in gaming_apps):
-                    self.apply_mode("performance")
-                    return "performance"
+            # Check per-application rules
+            matched = self.rules.best_mode(
+                self.rules.match(c.get("class", ""), c.get("title", "")) for c in clients
+            )
+            if matched:
+                self.apply_mode(matched)
+                return matched
             
             # Check for battery (if laptop)
             try:
@@ -222,32 +266,45 @@ class PerformanceManager:
         print(f"\n⚡ Current Performance Mode: {mode['name']}")
         print(f"📝 Description: {mode['description']}")
         
-        # Show system info
-        try:
-            # CPU usage
-            cpu_usage = subprocess.run(
-                ["sh", "-c", "grep 'cpu ' /proc/stat | awk '{usage=($2+$4)*100/($2+$4+$5)} END {print usage \"%\"}'"],
-                capture_output=True,
-                text=True
-            ).stdout.strip()
-            
-            # Memory usage 
-            mem_info = subprocess.run(
-                ["sh", "-c", "free | grep Mem | awk '{printf \"%.1f%%\", $3/$2 * 100.0}'"],
-                capture_output=True,
-                text=True
-            ).stdout.strip()
-            
-            print(f"🖥️ CPU Usage: {cpu_usage}")
-            print(f"💾 Memory Usage: {mem_info}")
-            
-        except:
-            print("📊 System info unavailable")
+        # Show system info, from the collector when it is running
+        import metrics_ring
+
+        sample = metrics_ring.latest()
+        if sample:
+            usage = {
+                "cpu": sample["cpu"] or 0,
+                "cores": [core or 0 for core in metrics_ring.core_usage(sample)],
+                "memory": {
+                    "percent": sample["mem_percent"] or 0,
+                    "used": sample["mem_used"] / 1024,
+                    "total": sample["mem_total"] / 1024,
+                },
+                "interval": None,
+            }
+        else:
+            from proc_metrics import SystemSampler
+
+            try:
+                usage = SystemSampler().sample()
+            except OSError:
+                print("📊 System info unavailable")
+                return
+        memory = usage["memory"]
+        window = f"last {usage['interval']:.1f}s" if usage["interval"] else "collector"
+        print(f"🖥️ CPU Usage: {usage['cpu']:.1f}% ({window})")
+        print(f"🧮 Cores: {' '.join(f'{core:.0f}%' for core in usage['cores'])}")
+        print(
+            f"💾 Memory Usage: {memory['percent']:.1f}% "
+            f"({memory['used'] / 1048576:.1f}/{memory['total'] / 1048576:.1f} GB)"
+        )
     
     def interactive_menu(self):
         """Interactive performance mode selector"""
         print("⚡ Performance Manager")
         print("=" * 30)
+        if self.current_mode not in self.modes:
+            # Saved before the mode was removed from performance_modes.toml
+            self.current_mode = "balanced"
         print(f"Current Mode: {self.modes[self.current_mode]['name']}")
         print()
         
@@ -288,6 +345,807 @@ class PerformanceManager:
                 print("\n👋 Goodbye!")
                 break
 
+class ModeConfig:
+    """Performance modes from ~/.config/hypr/performance_modes.toml (or .json)
+
+    Each table under [modes.<name>] may set name, description, the high level
+    settings used by the built-in modes, a cpu policy and a hyprland table of
+    arbitrary keywords (e.g. "decoration:blur:passes" = 2) that are applied
+    after, and override, the ones derived from settings. A mode named like a
+    built-in one only needs the keys it changes.
+
+    Modes are validated and compiled into (keyword, value) lists once per
+    modification time of the file and kept in ~/.cache/choso as marshal data,
+    so normal runs never parse TOML/JSON.
+    """
+
+    SETTINGS_SCHEMA = {
+        "animations": bool,
+        "blur": bool,
+        "shadows": bool,
+        "transparency": bool,
+        "vfr": bool,
+        "gaps": int,
+        "rounding": int,
+        "border_size": int,
+    }
+    CPU_SCHEMA = {
+        "governor": str,
+        "epp": str,
+        "min_freq": (int, str),
+        "max_freq": (int, str),
+        "turbo": bool,
+    }
+    MODE_SCHEMA = {
+        "name": str,
+        "description": str,
+        "settings": SETTINGS_SCHEMA,
+        "cpu": CPU_SCHEMA,
+        "hyprland": dict,
+    }
+
+    CACHE_FILE = "~/.cache/choso/performance_modes.marshal"
+    CACHE_VERSION = 1
+
+    def __init__(self, config_base, builtin_modes):
+        self.config_base = config_base
+        self.builtin_modes = builtin_modes
+        self.cache_file = os.path.expanduser(self.CACHE_FILE)
+
+    def config_file(self):
+        """(path, mtime_ns) of the TOML or JSON config, or (None, 0)"""
+        for extension in (".toml", ".json"):
+            path = self.config_base + extension
+            try:
+                return path, os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+        return None, 0
+
+    def load(self):
+        """Compiled modes: from the cache when it is current, else rebuilt"""
+        import marshal
+
+        path, mtime = self.config_file()
+        if path is None:
+            return self.compile_modes({})
+
+        # Built-in defaults live in this script, so its mtime is part of the key
+        key = (self.CACHE_VERSION, path, mtime, os.stat(__file__).st_mtime_ns)
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached_key, modes = marshal.load(f)
+            if cached_key == key:
+                return modes
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+
+        modes = self.compile_modes(self.parse(path))
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp = f"{self.cache_file}.{os.getpid()}"
+            with open(tmp, "wb") as f:
+                marshal.dump((key, modes), f)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+        return modes
+
+    def parse(self, path):
+        """Valid user modes from the config file; invalid ones are reported"""
+        try:
+            if path.endswith(".toml"):
+                import tomllib
+
+                with open(path, "rb") as f:
+                    data = tomllib.load(f)
+            else:
+                with open(path, "r") as f:
+                    data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ {path}: {e}")
+            return {}
+
+        modes = data.get("modes", {}) if isinstance(data, dict) else None
+        if not isinstance(modes, dict):
+            print(f"⚠️ {path}: expected a 'modes' table")
+            return {}
+
+        valid = {}
+        for name, mode in modes.items():
+            errors = self.validate(mode, self.MODE_SCHEMA, f"modes.{name}")
+            for error in errors:
+                print(f"⚠️ {os.path.basename(path)}: {error}")
+            if not errors:
+                valid[name] = mode
+        return valid
+
+    def validate(self, value, schema, where):
+        """Error messages for a value checked against a schema dict"""
+        if not isinstance(value, dict):
+            return [f"{where}: expected a table"]
+
+        errors = []
+        for key, item in value.items():
+            expected = schema.get(key)
+            if expected is None:
+                errors.append(f"{where}.{key}: unknown key")
+            elif isinstance(expected, dict):
+                errors += self.validate(item, expected, f"{where}.{key}")
+            elif expected is dict:
+                errors += self.validate_keywords(item, f"{where}.{key}")
+            elif isinstance(item, bool) and expected is not bool:
+                # bool is an int subclass, but true is never a valid gap size
+                errors.append(f"{where}.{key}: expected {self.type_name(expected)}")
+            elif not isinstance(item, expected):
+                errors.append(f"{where}.{key}: expected {self.type_name(expected)}")
+        return errors
+
+    def validate_keywords(self, keywords, where):
+        """Hyprland keyword tables map option names to scalar values"""
+        if not isinstance(keywords, dict):
+            return [f"{where}: expected a table"]
+        errors = []
+        for name, value in keywords.items():
+            if not re.fullmatch(r"[A-Za-z0-9_.:-]+", name):
+                errors.append(f"{where}: invalid option name {name!r}")
+            elif not isinstance(value, (bool, int, float, str)):
+                errors.append(f"{where}.{name}: expected a scalar value")
+            elif isinstance(value, str) and (";" in value or "\n" in value):
+                # Would split the hyprctl --batch command
+                errors.append(f"{where}.{name}: value may not contain ';'")
+        return errors
+
+    @staticmethod
+    def type_name(expected):
+        if isinstance(expected, tuple):
+            return " or ".join(t.__name__ for t in expected)
+        return expected.__name__
+
+    def compile_modes(self, user_modes):
+        """Merge user modes over the built-ins and compile their keywords"""
+        compiled = {}
+        for name in list(self.builtin_modes) + [
+            n for n in user_modes if n not in self.builtin_modes
+        ]:
+            base = self.builtin_modes.get(name, {})
+            user = user_modes.get(name, {})
+            settings = dict(base.get("settings", {}), **user.get("settings", {}))
+            keywords = self.settings_keywords(settings)
+            keywords.update(
+                (option, self.format_value(value))
+                for option, value in user.get("hyprland", {}).items()
+            )
+            compiled[name] = {
+                "name": user.get("name", base.get("name", name.title())),
+                "description": user.get("description", base.get("description", "")),
+                "keywords": list(keywords.items()),
+                "cpu": dict(base.get("cpu", {}), **user.get("cpu", {})) or None,
+            }
+        return compiled
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        return str(value)
+
+    def settings_keywords(self, settings):
+        """Hyprland keywords for the high level settings of a mode"""
+        keywords = {}
+        if "animations" in settings:
+            keywords["animations:enabled"] = self.format_value(settings["animations"])
+
+        if settings.get("blur"):
+            keywords["decoration:blur:enabled"] = "true"
+            keywords["decoration:blur:size"] = "2"
+            keywords["decoration:blur:passes"] = "4"
+        elif "blur" in settings:
+            keywords["decoration:blur:enabled"] = "false"
+
+        if settings.get("shadows"):
+            keywords["decoration:shadow:enabled"] = "true"
+            keywords["decoration:shadow:range"] = "4"
+            keywords["decoration:shadow:render_power"] = "3"
+        elif "shadows" in settings:
+            keywords["decoration:shadow:enabled"] = "false"
+
+        if settings.get("transparency"):
+            keywords["decoration:active_opacity"] = "0.95"
+            keywords["decoration:inactive_opacity"] = "0.90"
+        elif "transparency" in settings:
+            keywords["decoration:active_opacity"] = "1.0"
+            keywords["decoration:inactive_opacity"] = "1.0"
+
+        if "vfr" in settings:
+            keywords["misc:vfr"] = self.format_value(settings["vfr"])
+        if "gaps" in settings:
+            keywords["general:gaps_in"] = str(settings["gaps"])
+            keywords["general:gaps_out"] = str(settings["gaps"] + 2)
+        if "rounding" in settings:
+            keywords["decoration:rounding"] = str(settings["rounding"])
+        if "border_size" in settings:
+            keywords["general:border_size"] = str(settings["border_size"])
+        return keywords
+
+
+class ProfileRules:
+    """Per-application mode rules, compiled into one combined matcher
+
+    ~/.config/hypr/performance_rules.json holds a list of rules such as
+    {"class": "blender", "mode": "performance", "priority": 50} or
+    {"title": "re:.*YouTube.*", "mode": "battery", "priority": 10}.
+    Patterns are case-insensitive globs, or regexes when prefixed with "re:";
+    a missing class or title matches anything. Rules whose patterns do not
+    compile are skipped with a warning. The rules become alternatives of a
+    single regex ordered by priority, so one fullmatch finds the winning
+    rule; only regexes with capture groups, whose numbering the combined
+    regex would shift, are matched on their own. Results are cached per
+    class (per class and title when any rule looks at titles).
+    """
+
+    DEFAULT_RULES = [
+        {"class": f"*{app}*", "mode": "performance", "priority": 100}
+        for app in ("steam_app_", "lutris", "heroic", "minecraft", "wine")
+    ]
+
+    def __init__(self, rules_file=None, rules=None):
+        import functools
+
+        if rules is None:
+            rules = self.load(rules_file)
+        self.rules = [rule for rule in self.sorted_rules(rules) if self.valid(rule)]
+        self.uses_title = any(rule.get("title") for rule in self.rules)
+        self.pattern, self.separate = self.compile(self.rules)
+        self._match = functools.lru_cache(maxsize=1024)(self._match_uncached)
+
+    def load(self, rules_file):
+        """Rules from the user file, or the built-in gaming rules"""
+        try:
+            with open(rules_file, "r") as f:
+                data = json.load(f)
+            rules = data.get("rules", []) if isinstance(data, dict) else data
+            return [r for r in rules if isinstance(r, dict) and r.get("mode")]
+        except (OSError, ValueError, TypeError):
+            return self.DEFAULT_RULES
+
+    @staticmethod
+    def sorted_rules(rules):
+        # Stable sort: equal priorities keep file order
+        return sorted(rules, key=lambda rule: -rule.get("priority", 0))
+
+    @staticmethod
+    def field_regex(pattern):
+        """Regex for one class/title pattern; never crosses the NUL separator"""
+        if not pattern:
+            return "[^\\x00]*"
+        if pattern.startswith("re:"):
+            return f"(?:{pattern[3:]})"
+        wildcards = {"*": "[^\\x00]*", "?": "[^\\x00]"}
+        return "".join(wildcards.get(ch) or re.escape(ch) for ch in pattern)
+
+    def rule_regex(self, rule):
+        """Compiled regex of one rule over "class\\x00title" """
+        return re.compile(
+            f"{self.field_regex(rule.get('class'))}"
+            f"\\x00{self.field_regex(rule.get('title'))}",
+            re.IGNORECASE,
+        )
+
+    def valid(self, rule):
+        try:
+            self.rule_regex(rule)
+            return True
+        except (re.error, AttributeError, TypeError) as e:
+            # AttributeError/TypeError: a class or title that is not a string
+            print(f"⚠️ Skipping performance rule {rule}: {e}")
+            return False
+
+    def compile(self, rules):
+        """(combined regex or None, [(rule index, regex)] matched on their own)"""
+        alternatives = []
+        separate = []
+        for i, rule in enumerate(rules):
+            regex = self.rule_regex(rule)
+            if regex.groups:
+                separate.append((i, regex))
+            else:
+                alternatives.append(f"(?P<r{i}>{regex.pattern})")
+        if not alternatives:
+            return None, separate
+        return re.compile("|".join(alternatives), re.IGNORECASE), separate
+
+    def _match_uncached(self, class_name, title):
+        subject = f"{class_name}\x00{title}"
+        index = None
+        if self.pattern is not None:
+            match = self.pattern.fullmatch(subject)
+            if match:
+                index = int(match.lastgroup[1:])
+        # Rules matched on their own only win when they come first
+        for i, regex in self.separate:
+            if index is not None and i > index:
+                break
+            if regex.fullmatch(subject):
+                index = i
+                break
+        if index is None:
+            return None
+        rule = self.rules[index]
+        return (rule.get("priority", 0), rule["mode"])
+
+    def match(self, class_name, title=""):
+        """(priority, mode) of the winning rule for a window, or None"""
+        return self._match(class_name or "", (title or "") if self.uses_title else "")
+
+    @staticmethod
+    def best_mode(matches):
+        """Mode of the highest-priority match among several windows"""
+        best = max((m for m in matches if m), default=None)
+        return best[1] if best else None
+
+    def watch(self, manager):
+        """Follow Hyprland window events and apply the best matching mode
+
+        Only the opened, closed or retitled window is re-evaluated; the rest
+        keep their cached match.
+        """
+        import socket
+
+        if not hypr_ipc.instance_dir():
+            print("❌ Not running inside Hyprland")
+            return
+
+        try:
+            clients = hypr_ipc.query("clients")
+        except (OSError, ValueError):
+            clients = []
+        # address -> (class, cached match)
+        windows = {}
+        for client in clients:
+            class_name = client.get("class", "")
+            address = client.get("address", "").removeprefix("0x")
+            windows[address] = (class_name, self.match(class_name, client.get("title")))
+        fallback = manager.current_mode
+        applied = self.best_mode(m for _, m in windows.values()) or fallback
+        if applied != manager.current_mode:
+            manager.apply_mode(applied)
+        print(f"👀 Watching windows ({len(self.rules)} rules), mode: {applied}")
+
+        events = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        events.connect(hypr_ipc.socket_path(".socket2.sock"))
+        try:
+            for line in events.makefile("r", encoding="utf-8", errors="replace"):
+                event, _, data = line.rstrip("\n").partition(">>")
+                if event == "openwindow":
+                    fields = (data.split(",", 3) + ["", "", ""])[:4]
+                    address, _, class_name, title = fields
+                    windows[address] = (class_name, self.match(class_name, title))
+                elif event == "closewindow":
+                    windows.pop(data, None)
+                elif event == "windowtitlev2" and self.uses_title and "," in data:
+                    address, title = data.split(",", 1)
+                    if address in windows:
+                        class_name = windows[address][0]
+                        windows[address] = (class_name, self.match(class_name, title))
+                else:
+                    continue
+
+                wanted = self.best_mode(m for _, m in windows.values()) or fallback
+                if wanted != applied:
+                    manager.apply_mode(wanted)
+                    applied = wanted
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+        finally:
+            events.close()
+
+
+class PerformanceGovernor:
+    """Adaptive mode selection from CPU load, temperature and power source
+
+    Each sample turns a set of conditions on or off, with separate enter and
+    exit thresholds (hysteresis). The conditions map to a target mode, which
+    has to stay the target for its hold time, and a minimum dwell time has to
+    pass since the last switch, before the mode actually changes.
+    """
+
+    DEFAULT_POLICY = {
+        "hot_enter": 85, "hot_exit": 75,          # °C
+        "battery_enter": 30, "battery_exit": 40,  # % charge while discharging
+        "busy_enter": 80, "busy_exit": 50,        # % CPU
+        "idle_enter": 10, "idle_exit": 25,        # % CPU, only on AC
+        "hold": {"performance": 6, "battery": 10, "balanced": 20, "beauty": 60},
+        "min_dwell": 30,                          # seconds between switches
+    }
+    LOG_ENTRIES = 500  # decisions kept in the log
+    TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "governor-trace.jsonl")
+
+    def __init__(self, manager=None, policy=None, log_file=None, dry_run=False):
+        self.manager = manager
+        self.policy = dict(self.DEFAULT_POLICY, **(policy or {}))
+        self.log_file = log_file or os.path.expanduser("~/.cache/choso/governor.log")
+        self.dry_run = dry_run
+        self.mode = manager.current_mode if manager else "balanced"
+        self.conditions = set()
+        self.pending = None
+        self.last_switch = None
+        self.decisions = []
+
+    def update_conditions(self, sample):
+        """Turn conditions on/off using enter and exit thresholds"""
+        p = self.policy
+
+        def hysteresis(name, enter, stay):
+            if enter or (name in self.conditions and stay):
+                self.conditions.add(name)
+            else:
+                self.conditions.discard(name)
+
+        temp, cpu, battery = sample.get("temp"), sample["cpu"], sample.get("battery")
+        discharging = sample.get("discharging") and battery is not None
+
+        hysteresis("hot",
+                   temp is not None and temp >= p["hot_enter"],
+                   temp is not None and temp > p["hot_exit"])
+        hysteresis("low_battery",
+                   discharging and battery <= p["battery_enter"],
+                   discharging and battery < p["battery_exit"])
+        hysteresis("busy", cpu >= p["busy_enter"], cpu > p["busy_exit"])
+        hysteresis("idle",
+                   not discharging and cpu <= p["idle_enter"],
+                   not discharging and cpu < p["idle_exit"])
+
+    def target_mode(self):
+        """Mode the current conditions ask for, most urgent first"""
+        if "hot" in self.conditions or "low_battery" in self.conditions:
+            return "battery"
+        if "busy" in self.conditions:
+            return "performance"
+        if "idle" in self.conditions:
+            return "beauty"
+        return "balanced"
+
+    def step(self, sample):
+        """Feed one sample; returns the new mode when a switch happens"""
+        now = sample["t"]
+        self.update_conditions(sample)
+        target = self.target_mode()
+
+        if target == self.mode:
+            self.pending = None
+            return None
+        if self.pending is None or self.pending[0] != target:
+            self.pending = (target, now)
+
+        held = now - self.pending[1]
+        dwelled = self.last_switch is None or now - self.last_switch >= self.policy["min_dwell"]
+        if held < self.policy["hold"].get(target, 0) or not dwelled:
+            return None
+
+        self.switch(target, sample, held)
+        return target
+
+    def switch(self, target, sample, held):
+        """Apply (unless dry run) and log a decision"""
+        decision = {
+            "t": sample["t"],
+            "from": self.mode,
+            "to": target,
+            "conditions": sorted(self.conditions),
+            "held": round(held, 1),
+            "metrics": sample,
+        }
+        self.decisions.append(decision)
+        self.mode = target
+        self.last_switch = sample["t"]
+        self.pending = None
+
+        print(f"🤖 {decision['from']} → {target} ({', '.join(decision['conditions']) or 'no conditions'}) "
+              f"cpu={sample['cpu']}% temp={sample.get('temp')} battery={sample.get('battery')}")
+        try:
+            self.write_log(decision)
+        except OSError:
+            pass
+
+        if self.manager and not self.dry_run:
+            self.manager.apply_mode(target)
+
+    def write_log(self, decision):
+        """Append a decision to the log, keeping only the last LOG_ENTRIES"""
+        if not os.path.isfile(self.log_file):
+            os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+            with open(self.log_file, "a") as f:
+                f.write(json.dumps(decision) + "\n")
+            return
+        with open(self.log_file, "r") as f:
+            entries = f.readlines()[-(self.LOG_ENTRIES - 1):]
+        entries.append(json.dumps(decision) + "\n")
+        temp_file = self.log_file + ".tmp"
+        with open(temp_file, "w") as f:
+            f.writelines(entries)
+        os.replace(temp_file, self.log_file)
+
+    def run(self, interval=2.0, record_file=None):
+        """Live loop sampling /proc and /sys every interval seconds"""
+        import time
+
+        from proc_metrics import LoadSampler
+
+        sampler = LoadSampler()
+        record = open(record_file, "a") if record_file else None
+        if record:
+            # Replays start where this run starts, whatever mode is live then
+            record.write(json.dumps({"start_mode": self.mode}) + "\n")
+        print(f"🤖 Governor running every {interval}s (mode: {self.mode})")
+        try:
+            while True:
+                time.sleep(interval)
+                sample = sampler.sample(round(time.time(), 2))
+                if record:
+                    record.write(json.dumps(sample) + "\n")
+                    record.flush()
+                self.step(sample)
+        except KeyboardInterrupt:
+            print("\n👋 Governor stopped")
+        finally:
+            if record:
+                record.close()
+
+    def replay(self, trace_file):
+        """Feed a recorded trace (one JSON sample per line) through the policy
+
+        Starts from the mode the recording started in ({"start_mode": ...}
+        lines, written by run()), or from balanced for traces without one,
+        so the result does not depend on the mode that is live now.
+        """
+        self.mode = "balanced"
+        with open(trace_file, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "start_mode" in entry:
+                    # A new recording session appended to the same file
+                    self.mode = entry["start_mode"]
+                    self.conditions = set()
+                    self.pending = None
+                    self.last_switch = None
+                else:
+                    self.step(entry)
+        return self.decisions
+
+    @classmethod
+    def check(cls, trace_file=None):
+        """Replay the bundled trace and compare against the expected switches
+
+        The trace goes busy, cool (with a one-sample spike), hot right after
+        a switch, idle on AC and finally discharging, and every phase spends
+        half a minute between its enter and exit thresholds. Replayed again
+        with exit == enter it has to switch more often (hysteresis keeps the
+        mode), and with no min_dwell two switches have to land closer than
+        min_dwell (the dwell spaces them out), or the trace no longer tests
+        either.
+        """
+        trace_file = trace_file or cls.TRACE_FILE
+        expected = [
+            (10, "balanced", "performance", ["busy"]),
+            (100, "performance", "balanced", []),
+            (130, "balanced", "battery", ["hot"]),
+            (235, "battery", "beauty", ["idle"]),
+            (305, "beauty", "battery", ["low_battery"]),
+        ]
+        p = cls.DEFAULT_POLICY
+        failures = []
+
+        def replay(policy=None):
+            governor = cls(policy=policy, log_file=os.devnull, dry_run=True)
+            return [
+                (d["t"], d["from"], d["to"], d["conditions"])
+                for d in governor.replay(trace_file)
+            ]
+
+        decisions = replay()
+        if decisions != expected:
+            failures.append(f"switches {decisions} != {expected}")
+
+        no_hysteresis = replay({
+            "hot_exit": p["hot_enter"], "battery_exit": p["battery_enter"],
+            "busy_exit": p["busy_enter"], "idle_exit": p["idle_enter"],
+        })
+        if len(no_hysteresis) <= len(expected):
+            failures.append(
+                f"without hysteresis the trace switches {len(no_hysteresis)} "
+                f"times, not more than {len(expected)}"
+            )
+
+        no_dwell = replay({"min_dwell": 0})
+        gaps = [b[0] - a[0] for a, b in zip(no_dwell, no_dwell[1:])]
+        if not gaps or min(gaps) >= p["min_dwell"]:
+            failures.append(f"without min_dwell no switches come closer than {p['min_dwell']}s")
+
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print(
+                f"✅ {len(expected)} expected switches; {len(no_hysteresis)} without "
+                f"hysteresis, {min(gaps)}s apart without min_dwell"
+            )
+        return not failures
+
+
+class ModeBenchmark:
+    """Cost of every mode under the same scripted window workload
+
+    Each mode is applied in turn, then a fixed sequence of open, move,
+    resize, workspace switch and close dispatches runs while the
+    compositor's CPU time (from /proc/<pid>/stat), overall CPU load and the
+    IPC round trip of every dispatch are measured. Without a Hyprland
+    session (or with fake=True) the workload runs against hypr_ipc's
+    FakeHyprServer, which only checks the workload end to end: it renders
+    nothing, so its numbers say nothing about the modes, and the system's
+    CPU policy and saved mode are left alone.
+    """
+
+    WINDOW_CLASS = "choso-bench"
+    WINDOWS = 3
+
+    def __init__(self, manager, rounds=3, settle=0.05, fake=False, timeout=5.0):
+        self.manager = manager
+        self.rounds = rounds
+        self.settle = settle
+        self.fake = fake
+        self.timeout = timeout
+        self.fake_server = False
+
+    def bench_windows(self):
+        """Addresses of the benchmark's windows that are open"""
+        return [
+            client["address"]
+            for client in hypr_ipc.query("clients")
+            if client.get("class") == self.WINDOW_CLASS
+        ]
+
+    def open_window(self, dispatch):
+        """Start one window and wait until it is mapped; its address"""
+        import time
+
+        known = set(self.bench_windows())
+        dispatch(f"dispatch exec [float] kitty --class {self.WINDOW_CLASS}")
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            for address in self.bench_windows():
+                if address not in known:
+                    return address
+            time.sleep(0.02)
+        raise TimeoutError(f"no {self.WINDOW_CLASS} window after {self.timeout}s")
+
+    def workload(self, workspace, dispatch):
+        """One round: every window is addressed directly once it exists"""
+        addresses = []
+        try:
+            for _ in range(self.WINDOWS):
+                addresses.append(self.open_window(dispatch))
+            for address in addresses:
+                target = f"address:{address}"
+                for dx, dy in ((120, 0), (0, 120), (-120, 0), (0, -120)):
+                    dispatch(f"dispatch movewindowpixel {dx} {dy},{target}")
+                for dw, dh in ((160, 90), (-160, -90)):
+                    dispatch(f"dispatch resizewindowpixel {dw} {dh},{target}")
+            dispatch(f"dispatch workspace {workspace + 1}")
+            dispatch(f"dispatch workspace {workspace}")
+        finally:
+            for address in addresses:
+                dispatch(f"dispatch closewindow address:{address}")
+
+    def apply(self, mode_name):
+        """Switch modes; on the fake compositor only its keywords are sent"""
+        if self.fake_server:
+            self.manager.hypr_batch(self.manager.modes[mode_name]["keywords"])
+        else:
+            self.manager.apply_mode(mode_name, quiet=True)
+
+    def measure(self, mode_name, pid, workspace):
+        """Metrics of one mode over all rounds"""
+        import statistics
+        import time
+
+        from proc_metrics import busy_percent, read_cpu_times
+
+        self.apply(mode_name)
+        time.sleep(self.settle * 4)
+
+        latencies = []
+
+        def dispatch(command):
+            sent = time.perf_counter()
+            hypr_ipc.request(command)
+            latencies.append((time.perf_counter() - sent) * 1000)
+            time.sleep(self.settle)
+
+        cpu_before = read_cpu_times()["cpu"]
+        ticks_before = hypr_ipc.process_cpu_ticks(pid)
+        start = time.perf_counter()
+        for _ in range(self.rounds):
+            self.workload(workspace, dispatch)
+        elapsed = time.perf_counter() - start
+        ticks = hypr_ipc.process_cpu_ticks(pid) - ticks_before
+
+        latencies.sort()
+        return {
+            "mode": mode_name,
+            "compositor": 100 * ticks / os.sysconf("SC_CLK_TCK") / elapsed,
+            "cpu": busy_percent(cpu_before, read_cpu_times()["cpu"]),
+            "p50": statistics.median(latencies),
+            "p95": latencies[int(len(latencies) * 0.95) - 1],
+        }
+
+    def start_fake_server(self, runtime_dir):
+        """Run FakeHyprServer in a child process and point hypr_ipc at it"""
+        import time
+
+        server = subprocess.Popen(
+            [sys.executable, hypr_ipc.__file__, "--fake-server", runtime_dir]
+        )
+        os.environ["XDG_RUNTIME_DIR"] = runtime_dir
+        os.environ["HYPRLAND_INSTANCE_SIGNATURE"] = hypr_ipc.FAKE_SIGNATURE
+        path = hypr_ipc.socket_path()
+        for _ in range(100):
+            if os.path.exists(path):
+                break
+            time.sleep(0.05)
+        return server
+
+    def run(self):
+        """Benchmark every mode and print the results table"""
+        import tempfile
+
+        server = None
+        with tempfile.TemporaryDirectory() as runtime_dir:
+            if self.fake or not hypr_ipc.instance_dir():
+                server = self.start_fake_server(runtime_dir)
+                self.fake_server = True
+                pid = server.pid
+            else:
+                pid = hypr_ipc.compositor_pid()
+                if pid is None:
+                    print("❌ Hyprland process not found")
+                    return []
+
+            original_mode = self.manager.current_mode
+            results = []
+            try:
+                workspace = hypr_ipc.query("activeworkspace").get("id", 1)
+                target = "fake compositor" if server else f"Hyprland (pid {pid})"
+                print(f"⏱️ Benchmarking {len(self.manager.modes)} modes on {target}")
+                for mode_name in self.manager.modes:
+                    results.append(self.measure(mode_name, pid, workspace))
+                    print(f"   ✓ {mode_name}")
+            except TimeoutError as e:
+                print(f"❌ {e}")
+            finally:
+                if server is None and original_mode in self.manager.modes:
+                    self.manager.apply_mode(original_mode, quiet=True)
+                if server:
+                    server.terminate()
+                    server.wait()
+
+        print(
+            f"\n{'Mode':<16}{'Compositor CPU':>16}{'System CPU':>12}"
+            f"{'Dispatch p50':>14}{'p95':>10}"
+        )
+        for result in results:
+            print(
+                f"{result['mode']:<16}{result['compositor']:>15.1f}%"
+                f"{result['cpu']:>11.1f}%{result['p50']:>12.2f}ms"
+                f"{result['p95']:>8.2f}ms"
+            )
+        if server and results:
+            print("\n⚠️ Fake compositor: the workload ran, but nothing was rendered,")
+            print("   so these numbers do not compare the modes")
+        return results
+
+
 def main():
     pm = PerformanceManager()
     
@@ -302,9 +1160,34 @@ def main():
             pm.auto_detect_mode()
         elif action == "--status":
             pm.show_current_status()
+        elif action == "--benchmark":
+            args = sys.argv[2:]
+            rounds = int(args[0]) if args and args[0].isdigit() else 3
+            ModeBenchmark(pm, rounds, fake="--fake" in args).run()
+        elif action == "--watch-rules":
+            pm.rules.watch(pm)
+        elif action == "--governor":
+            args = sys.argv[2:]
+            if "--check" in args:
+                sys.exit(0 if PerformanceGovernor.check() else 1)
+            elif "--replay" in args:
+                governor = PerformanceGovernor(
+                    pm, log_file=os.devnull, dry_run=True
+                )
+                decisions = governor.replay(args[args.index("--replay") + 1])
+                print(f"📼 {len(decisions)} switch(es), final mode: {governor.mode}")
+            else:
+                interval = float(args[0]) if args and args[0][0].isdigit() else 2.0
+                record = args[args.index("--record") + 1] if "--record" in args else None
+                PerformanceGovernor(pm).run(interval, record)
         else:
             print("Usage: performance-manager.py [--mode name] [--gaming] [--auto] [--status]")
-            print("Available modes: performance, balanced, beauty, battery")
+            print("       performance-manager.py --governor [interval] [--record trace.jsonl]")
+            print("       performance-manager.py --governor --replay trace.jsonl")
+            print("       performance-manager.py --governor --check")
+            print("       performance-manager.py --watch-rules")
+            print("       performance-manager.py --benchmark [rounds] [--fake]")
+            print(f"Available modes: {', '.join(pm.modes)}")
     else:
         pm.interactive_menu()
 
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Pressure Watcher
+Warns when the system stalls on CPU, memory or IO. Registers kernel PSI
+triggers on /proc/pressure/{cpu,memory,io} and sleeps in poll() until the
+kernel reports a crossed threshold, so it costs nothing while all is well.
+With --switch it also moves performance-manager.py to a lighter mode and
+restores the previous one once the pressure is gone. Kernels without PSI
+triggers (or that refuse them to unprivileged users, before Linux 6.4) are
+handled by sampling the stall totals every few seconds instead.
+
+Usage:
+  pressure-watcher.py [--switch MODE] [--cooldown seconds] [--interval seconds]
+  pressure-watcher.py --status
+"""
+
+import os
+import select
+import sys
+import time
+
+import desktop_notify
+from proc_metrics import ProcFile
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# resource: (PSI line, share of the window spent stalled that alerts)
+THRESHOLDS = {
+    "cpu": ("some", 0.40),
+    "memory": ("some", 0.10),
+    "io": ("some", 0.30),
+}
+# Unprivileged triggers need a window that is a multiple of 2s
+WINDOW = 2.0
+LABELS = {"cpu": "CPU", "memory": "Memory", "io": "IO"}
+
+
+def parse_pressure(text):
+    """{"some": {"avg10": 1.5, ..., "total": µs}, "full": {...}}"""
+    pressure = {}
+    for line in text.splitlines():
+        kind, *fields = line.split()
+        values = {}
+        for field in fields:
+            name, _, value = field.partition("=")
+            values[name] = int(value) if name == "total" else float(value)
+        pressure[kind] = values
+    return pressure
+
+
+class PressureWatcher:
+    def __init__(self, proc_root="/proc", switch_mode=None, cooldown=60.0, calm=120.0):
+        self.base = os.path.join(proc_root, "pressure")
+        self.switch_mode = switch_mode
+        self.cooldown = cooldown
+        self.calm = calm
+        self.last_alert = {}
+        self.last_pressure = None
+        self.restore_mode = None
+        self.manager = None
+
+    def read(self, resource):
+        with open(os.path.join(self.base, resource), "r") as f:
+            return parse_pressure(f.read())
+
+    def register(self):
+        """{fd: resource} with one trigger per resource; OSError if refused"""
+        triggers = {}
+        try:
+            for resource, (kind, share) in THRESHOLDS.items():
+                fd = os.open(
+                    os.path.join(self.base, resource),
+                    os.O_RDWR | os.O_NONBLOCK | os.O_CLOEXEC,
+                )
+                triggers[fd] = resource
+                stall_us = int(share * WINDOW * 1_000_000)
+                os.write(fd, f"{kind} {stall_us} {int(WINDOW * 1_000_000)}\0".encode())
+        except OSError:
+            for fd in triggers:
+                os.close(fd)
+            raise
+        return triggers
+
+    def watch_triggers(self, triggers):
+        """Block in poll() until the kernel fires a trigger"""
+        poller = select.poll()
+        for fd in triggers:
+            poller.register(fd, select.POLLPRI)
+
+        print(f"🧭 Waiting for PSI triggers ({', '.join(triggers.values())})")
+        while True:
+            # Only wake up on a timer while a mode switch waits to be undone
+            timeout = self.calm * 1000 if self.restore_mode else None
+            events = poller.poll(timeout)
+            if not events:
+                self.restore()
+                continue
+            for fd, event in events:
+                if event & select.POLLERR:
+                    raise OSError(f"PSI trigger on {triggers[fd]} was removed")
+                if event & select.POLLPRI:
+                    resource = triggers[fd]
+                    self.alert(resource, self.read(resource))
+
+    def watch_periodic(self, interval):
+        """Fallback: stall share of each interval from the PSI totals"""
+        files = {}
+        for resource in THRESHOLDS:
+            try:
+                files[resource] = ProcFile(os.path.join(self.base, resource))
+            except OSError:
+                continue
+        if not files:
+            raise OSError("no /proc/pressure files (kernel without CONFIG_PSI?)")
+
+        print(f"🧭 Sampling pressure every {interval}s ({', '.join(files)})")
+        previous = {name: parse_pressure(f.read()) for name, f in files.items()}
+        then = time.monotonic()
+        while True:
+            time.sleep(interval)
+            now = time.monotonic()
+            stalled = False
+            for resource, pressure_file in files.items():
+                pressure = parse_pressure(pressure_file.read())
+                kind, share = THRESHOLDS[resource]
+                delta = pressure[kind]["total"] - previous[resource][kind]["total"]
+                previous[resource] = pressure
+                if delta / ((now - then) * 1_000_000) >= share:
+                    stalled = True
+                    self.alert(resource, pressure)
+            then = now
+            if not stalled and self.last_pressure and now - self.last_pressure >= self.calm:
+                self.restore()
+
+    def alert(self, resource, pressure):
+        """Notify (at most once per cooldown per resource) and switch modes"""
+        now = time.monotonic()
+        self.last_pressure = now
+        kind, _ = THRESHOLDS[resource]
+        values = pressure.get(kind, {})
+        message = (
+            f"{LABELS[resource]} stalls: {values.get('avg10', 0):.1f}% over 10s, "
+            f"{values.get('avg60', 0):.1f}% over 60s"
+        )
+        print(f"⚠️ {message}")
+
+        if now - self.last_alert.get(resource, -self.cooldown) >= self.cooldown:
+            self.last_alert[resource] = now
+            desktop_notify.notify(
+                message,
+                f"{LABELS[resource]} Pressure",
+                icon="dialog-warning",
+                timeout=8000,
+                channel=f"pressure-{resource}",
+                urgency=2 if resource == "memory" else 1,
+            )
+
+        if self.switch_mode and self.restore_mode is None:
+            manager = self.performance_manager()
+            # The user may have switched modes since the manager was loaded
+            manager.current_mode = manager.load_current_mode()
+            if manager.current_mode != self.switch_mode:
+                self.restore_mode = manager.current_mode
+                print(f"🔀 Switching to {self.switch_mode} until the pressure is gone")
+                manager.apply_mode(self.switch_mode)
+
+    def restore(self):
+        """Go back to the mode that was active before the pressure"""
+        if self.restore_mode is None:
+            return
+        print(f"✅ Pressure gone, restoring {self.restore_mode}")
+        self.performance_manager().apply_mode(self.restore_mode)
+        self.restore_mode = None
+
+    def performance_manager(self):
+        """PerformanceManager from performance-manager.py, loaded on first use"""
+        if self.manager is None:
+            import importlib.util
+
+            spec = importlib.util.spec_from_file_location(
+                "performance_manager", os.path.join(SCRIPT_DIR, "performance-manager.py")
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self.manager = module.PerformanceManager()
+        return self.manager
+
+    def run(self, interval=5.0):
+        try:
+            try:
+                triggers = self.register()
+            except OSError as e:
+                print(f"⚠️ PSI triggers unavailable ({e}), falling back to sampling")
+            else:
+                try:
+                    self.watch_triggers(triggers)
+                except OSError as e:
+                    # POLLERR: the kernel dropped a trigger
+                    print(f"⚠️ PSI triggers stopped working ({e}), falling back to sampling")
+                finally:
+                    for fd in triggers:
+                        os.close(fd)
+            self.watch_periodic(interval)
+        except KeyboardInterrupt:
+            print("\n👋 Pressure watcher stopped")
+            self.restore()
+
+    def show_status(self):
+        print("🧭 Pressure stall information (share of time stalled)")
+        for resource in THRESHOLDS:
+            try:
+                pressure = self.read(resource)
+            except OSError:
+                print(f"   {LABELS[resource]:<7} unavailable")
+                continue
+            for kind, values in pressure.items():
+                print(
+                    f"   {LABELS[resource]:<7} {kind:<5} "
+                    f"10s {values['avg10']:5.1f}%  60s {values['avg60']:5.1f}%  "
+                    f"300s {values['avg300']:5.1f}%"
+                )
+        try:
+            for fd in self.register():
+                os.close(fd)
+            print("   Triggers: supported")
+        except OSError as e:
+            print(f"   Triggers: unavailable ({e.strerror or e}), periodic fallback")
+
+
+def main():
+    args = sys.argv[1:]
+    if "--status" in args:
+        PressureWatcher().show_status()
+        return
+    options = ("--switch", "--cooldown", "--interval")
+    if any(arg.startswith("--") and arg not in options for arg in args):
+        print(__doc__.strip().split("Usage:")[1])
+        return
+
+    switch_mode = args[args.index("--switch") + 1] if "--switch" in args else None
+    cooldown = float(args[args.index("--cooldown") + 1]) if "--cooldown" in args else 60.0
+    interval = float(args[args.index("--interval") + 1]) if "--interval" in args else 5.0
+    PressureWatcher(switch_mode=switch_mode, cooldown=cooldown).run(interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,875 @@
+#!/usr/bin/env python3
+"""
+Native /proc and /sys readers
+Shared by the ~/Scripts tools that need CPU, temperature or power data
+without psutil. Every reader takes the filesystem root as an argument so it
+can be pointed at a recorded or fake tree.
+"""
+
+import heapq
+import os
+import time
+from stat import S_ISBLK
+
+
+def runtime_file(name):
+    """Path of a per-user state file under $XDG_RUNTIME_DIR/choso"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/tmp/choso-{os.getuid()}")
+    return os.path.join(runtime_dir, "choso", name)
+
+
+class ProcFile:
+    """A /proc or /sys file opened once and re-read with pread
+
+    Reads go into a buffer kept between calls, which grows to the largest
+    size seen, so a read allocates nothing but the returned string.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        # Small to start with: sensors and cpufreq files hold a few bytes
+        self.buffer = bytearray(512)
+
+    def read(self):
+        size = 0
+        while True:
+            if size == len(self.buffer):
+                self.buffer.extend(bytes(len(self.buffer)))
+            with memoryview(self.buffer) as view:
+                count = os.preadv(self.fd, [view[size:]], size)
+            if not count:
+                break
+            size += count
+        with memoryview(self.buffer) as view:
+            return str(view[:size], "ascii", "replace")
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class CounterSnapshot:
+    """Two readings of a file of cumulative counters (stat, diskstats, net/dev)
+
+    The earlier reading is the one from the previous call or, for one-shot
+    commands, the snapshot the previous caller (from this or any other
+    process) left in the runtime directory, so they report recent activity
+    instead of the since-boot average. Only without a usable snapshot does
+    read() wait min_age seconds for a second reading.
+    """
+
+    def __init__(self, path, parse, snapshot_file):
+        self.file = ProcFile(path)
+        self.parse = parse
+        self.snapshot_file = snapshot_file
+        self.previous = None
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_file, "r") as f:
+                timestamp = float(f.readline())
+                return timestamp, self.parse(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def save_snapshot(self, timestamp, text):
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_file), mode=0o700, exist_ok=True)
+            tmp = f"{self.snapshot_file}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                f.write(f"{timestamp}\n{text}")
+            os.replace(tmp, self.snapshot_file)
+        except OSError:
+            pass
+
+    def read(self, min_age=0.1, max_age=300.0):
+        """(seconds between the readings, earlier counters, current counters)
+
+        min_age must be above zero so the interval never is.
+        """
+        text = self.file.read()
+        now = time.time()
+        current = self.parse(text)
+
+        previous = self.previous or self.load_snapshot()
+        if previous is None or not 0 < now - previous[0] <= max_age:
+            previous = (now, current)
+        if now - previous[0] < min_age:
+            time.sleep(min_age - (now - previous[0]))
+            text = self.file.read()
+            now = time.time()
+            current = self.parse(text)
+        self.previous = (now, current)
+        self.save_snapshot(now, text)
+        return now - previous[0], previous[1], current
+
+    def close(self):
+        self.file.close()
+
+
+def parse_cpu_times(text):
+    """Jiffy counters of the aggregate and per-core lines of /proc/stat"""
+    times = {}
+    for line in text.splitlines():
+        if not line.startswith("cpu"):
+            break
+        fields = line.split()
+        times[fields[0]] = tuple(int(x) for x in fields[1:])
+    return times
+
+
+def cpu_breakdown(previous, current):
+    """Busy, iowait and steal percentages between two counter tuples
+
+    Each tuple is one /proc/stat line: user nice system idle iowait irq
+    softirq steal guest guest_nice (older kernels stop earlier).
+    """
+    delta = [now - then for now, then in zip(current, previous)]
+    # guest time is already included in user and nice
+    total = sum(delta[:8])
+    if total <= 0:
+        return {"usage": 0.0, "iowait": 0.0, "steal": 0.0}
+    # idle + iowait count as not busy
+    return {
+        "usage": 100 * (total - delta[3] - delta[4]) / total,
+        "iowait": 100 * delta[4] / total,
+        "steal": 100 * delta[7] / total if len(delta) > 7 else 0.0,
+    }
+
+
+class CpuUsageTracker:
+    """cpu_breakdown() of every cpu line between successive update() calls"""
+
+    def __init__(self, proc_root="/proc"):
+        self.stat = ProcFile(os.path.join(proc_root, "stat"))
+        self.times = parse_cpu_times(self.stat.read())
+        self.names = list(self.times)
+
+    def update(self):
+        """Usage per cpu line since the previous call, None if cores changed"""
+        times = parse_cpu_times(self.stat.read())
+        usage = None
+        if times.keys() == self.times.keys():
+            usage = {name: cpu_breakdown(self.times[name], times[name]) for name in times}
+        self.times = times
+        self.names = list(times)
+        return usage
+
+
+def read_cpu_times(proc_root="/proc"):
+    with open(os.path.join(proc_root, "stat"), "r") as f:
+        return parse_cpu_times(f.read())
+
+
+def parse_meminfo(text):
+    """/proc/meminfo values in kB"""
+    info = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(":")
+        fields = value.split()
+        if fields and fields[0].isdigit():
+            info[name] = int(fields[0])
+    return info
+
+
+def memory_usage(meminfo):
+    """Total, used and available memory in kB plus the used percentage"""
+    total = meminfo.get("MemTotal", 0)
+    available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+    used = total - available
+    return {
+        "total": total,
+        "used": used,
+        "available": available,
+        "percent": 100 * used / total if total else 0.0,
+    }
+
+
+def busy_percent(previous, current):
+    """CPU busy percentage between two counter tuples of one /proc/stat line"""
+    return cpu_breakdown(previous, current)["usage"]
+
+
+def read_power_supply(sys_root="/sys"):
+    """AC state and battery level from /sys/class/power_supply"""
+    power = {"ac": None, "battery": None, "discharging": False}
+    supply_dir = os.path.join(sys_root, "class", "power_supply")
+    try:
+        supplies = sorted(os.listdir(supply_dir))
+    except OSError:
+        return power
+
+    def read(supply, name):
+        try:
+            with open(os.path.join(supply_dir, supply, name), "r") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    for supply in supplies:
+        kind = read(supply, "type")
+        if kind == "Mains":
+            online = read(supply, "online") == "1"
+            power["ac"] = online or bool(power["ac"])
+        elif kind == "Battery":
+            capacity = read(supply, "capacity")
+            if capacity and capacity.isdigit() and power["battery"] is None:
+                power["battery"] = int(capacity)
+            if read(supply, "status") == "Discharging":
+                power["discharging"] = True
+    return power
+
+
+class LoadSampler:
+    """Samples CPU load, hottest temperature and power source between calls"""
+
+    def __init__(self, proc_root="/proc", sys_root="/sys"):
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+        self.stat = ProcFile(os.path.join(proc_root, "stat"))
+        self.previous = parse_cpu_times(self.stat.read())
+        self.sensors = SensorRegistry(sys_root)
+
+    def sample(self, timestamp):
+        """One metrics dict; CPU load is the delta since the previous call"""
+        current = parse_cpu_times(self.stat.read())
+        cpu = busy_percent(self.previous["cpu"], current["cpu"])
+        self.previous = current
+
+        power = read_power_supply(self.sys_root)
+        return {
+            "t": timestamp,
+            "cpu": round(cpu, 1),
+            "temp": self.sensors.cpu_temperature(),
+            "ac": power["ac"],
+            "battery": power["battery"],
+            "discharging": power["discharging"],
+        }
+
+
+class SystemSampler:
+    """Current CPU (total and per core) and memory usage without waiting
+
+    CPU usage is the /proc/stat delta against the snapshot left by the
+    previous call (see CounterSnapshot), so it waits briefly for a second
+    reading only when there is no usable snapshot.
+    """
+
+    def __init__(self, proc_root="/proc", snapshot_file=None):
+        self.stat = CounterSnapshot(
+            os.path.join(proc_root, "stat"),
+            parse_cpu_times,
+            snapshot_file or runtime_file("cpu-snapshot"),
+        )
+        self.meminfo = ProcFile(os.path.join(proc_root, "meminfo"))
+
+    def sample(self, min_age=0.25, max_age=300.0):
+        """CPU and memory usage; CPU covers at least min_age seconds"""
+        elapsed, previous, current = self.stat.read(min_age, max_age)
+        cores = sorted(
+            (name for name in current if name != "cpu"), key=lambda n: int(n[3:])
+        )
+        return {
+            "cpu": busy_percent(previous["cpu"], current["cpu"]),
+            # A core brought online since the snapshot reads as idle
+            "cores": [
+                busy_percent(previous.get(name, current[name]), current[name])
+                for name in cores
+            ],
+            "memory": memory_usage(parse_meminfo(self.meminfo.read())),
+            "interval": elapsed,
+        }
+
+    def close(self):
+        self.stat.close()
+        self.meminfo.close()
+
+
+class ProcessTracker:
+    """Per-process CPU usage between successive scans of /proc/<pid>/stat
+
+    Keeps (start time, CPU ticks, name) per PID from the previous scan.
+    A PID whose start time changed was reused by a new process and starts
+    over; PIDs that disappeared are dropped at the next scan.
+    """
+
+    def __init__(self, proc_root="/proc"):
+        self.proc_root = proc_root
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.state = {}
+        self.last_scan = None
+
+    def read_stat(self, pid):
+        """(name, utime + stime, start time) of one process, None if it exited"""
+        try:
+            fd = os.open(f"{self.proc_root}/{pid}/stat", os.O_RDONLY)
+            try:
+                data = os.read(fd, 4096)
+            finally:
+                os.close(fd)
+        except OSError:
+            return None
+        # The name may itself contain spaces and parentheses
+        start = data.find(b"(")
+        end = data.rfind(b")")
+        fields = data[end + 2 :].split()
+        if start < 0 or len(fields) < 20:
+            return None
+        name = data[start + 1 : end].decode("utf-8", "replace")
+        return name, int(fields[11]) + int(fields[12]), int(fields[19])
+
+    def scan(self):
+        """Rescan all processes; returns {pid: (name, cpu percent)}
+
+        Processes first seen in this scan report 0.0, as their earlier CPU
+        time cannot be attributed to the interval.
+        """
+        now = time.monotonic()
+        elapsed = now - self.last_scan if self.last_scan else 0.0
+        scale = 100 / (self.clock_ticks * elapsed) if elapsed > 0 else 0.0
+
+        previous = self.state
+        state = {}
+        usage = {}
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            stat = self.read_stat(entry)
+            if stat is None:
+                continue
+            pid = int(entry)
+            name, ticks, started = stat
+            state[pid] = (started, ticks, name)
+            before = previous.get(pid)
+            if before and before[0] == started:
+                usage[pid] = (name, (ticks - before[1]) * scale)
+            else:
+                usage[pid] = (name, 0.0)
+
+        self.state = state
+        self.last_scan = now
+        return usage
+
+    @staticmethod
+    def top(usage, count=5):
+        """The count busiest processes as (pid, name, percent), busiest first"""
+        busiest = heapq.nlargest(count, usage.items(), key=lambda item: item[1][1])
+        return [(pid, name, percent) for pid, (name, percent) in busiest]
+
+
+class SensorRegistry:
+    """Every temperature sensor, discovered once and read through held fds
+
+    Covers hwmon temp*_input files (coretemp, k10temp, nvme, amdgpu, ...)
+    labelled "<chip> <label>", plus thermal zones that have no hwmon twin.
+    The discovered list is cached in the runtime directory and reused as
+    long as the set of hwmon devices and thermal zones is unchanged, so a
+    full sample is one pread per sensor.
+    """
+
+    # Preferred sources for "the" CPU temperature, best first
+    CPU_CHIPS = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "x86_pkg_temp")
+
+    def __init__(self, sys_root="/sys", cache_file=None):
+        self.sys_root = sys_root
+        self.cache_file = cache_file or runtime_file("sensors")
+        self.sensors = []
+        for chip, label, path in self.load():
+            try:
+                self.sensors.append((chip, label, ProcFile(path)))
+            except OSError:
+                continue
+
+    def device_key(self):
+        """Names of all hwmon devices and thermal zones"""
+        names = []
+        for kind in ("hwmon", "thermal"):
+            try:
+                directory = os.path.join(self.sys_root, "class", kind)
+                names += sorted(os.listdir(directory))
+            except OSError:
+                continue
+        return f"{self.sys_root}:{','.join(names)}"
+
+    def load(self):
+        """(chip, label, path) list, from the cache when it still matches"""
+        key = self.device_key()
+        try:
+            with open(self.cache_file, "r") as f:
+                if f.readline().rstrip("\n") == key:
+                    return [tuple(line.rstrip("\n").split("\t")) for line in f]
+        except OSError:
+            pass
+
+        sensors = self.discover()
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), mode=0o700, exist_ok=True)
+            tmp = f"{self.cache_file}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                f.write(f"{key}\n")
+                f.writelines(
+                    f"{chip}\t{label}\t{path}\n" for chip, label, path in sensors
+                )
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+        return sensors
+
+    def discover(self):
+        """Walk hwmon and thermal zones for temperature inputs"""
+
+        def read(path):
+            try:
+                with open(path, "r") as f:
+                    return f.read().strip()
+            except OSError:
+                return None
+
+        sensors = []
+        chips = set()
+        hwmon_dir = os.path.join(self.sys_root, "class", "hwmon")
+        try:
+            devices = sorted(os.listdir(hwmon_dir))
+        except OSError:
+            devices = []
+        for device in devices:
+            base = os.path.join(hwmon_dir, device)
+            chip = read(os.path.join(base, "name")) or device
+            chips.add(chip)
+            try:
+                inputs = sorted(
+                    (
+                        n
+                        for n in os.listdir(base)
+                        if n.startswith("temp") and n.endswith("_input")
+                    ),
+                    key=lambda n: int(n[4:-6] or 0),
+                )
+            except (OSError, ValueError):
+                continue
+            for name in inputs:
+                label = read(os.path.join(base, name[:-6] + "_label")) or name[:-6]
+                sensors.append((chip, label, os.path.join(base, name)))
+
+        thermal_dir = os.path.join(self.sys_root, "class", "thermal")
+        try:
+            zones = sorted(
+                z for z in os.listdir(thermal_dir) if z.startswith("thermal_zone")
+            )
+        except OSError:
+            zones = []
+        for zone in zones:
+            kind = read(os.path.join(thermal_dir, zone, "type")) or zone
+            # Zones such as acpitz also register a hwmon device with that name
+            if kind not in chips:
+                sensors.append((kind, zone, os.path.join(thermal_dir, zone, "temp")))
+        return sensors
+
+    def read(self):
+        """{"<chip> <label>": degrees} for every sensor that answered"""
+        readings = {}
+        for chip, label, sensor in self.sensors:
+            try:
+                value = int(sensor.read()) / 1000
+            except (OSError, ValueError):
+                # Sleeping devices (suspended dGPU, NVMe in D3) return errors
+                continue
+            readings[f"{chip} {label}"] = value
+        return readings
+
+    def cpu_temperature(self, readings=None):
+        """Hottest reading of the preferred CPU chip, else of any sensor"""
+        readings = self.read() if readings is None else readings
+        for chip in self.CPU_CHIPS:
+            values = [
+                value
+                for name, value in readings.items()
+                if name.split(" ", 1)[0] == chip
+            ]
+            if values:
+                return max(values)
+        return max(readings.values(), default=None)
+
+    def close(self):
+        for _, _, sensor in self.sensors:
+            sensor.close()
+
+
+def parse_dpm(text, maximum=False):
+    """MHz of the active (or highest) level in an amdgpu pp_dpm_* table
+
+    Lines look like "1: 1800Mhz *", the active level marked with a star.
+    """
+    levels = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) >= 2 and fields[1].lower().endswith("mhz"):
+            levels.append((int(fields[1][:-3]), fields[-1] == "*"))
+    if maximum:
+        return max((mhz for mhz, _ in levels), default=None)
+    return next((mhz for mhz, active in levels if active), None)
+
+
+class GpuMonitor:
+    """Utilisation, clocks, VRAM, temperature and power of every DRM card
+
+    Reads what the kernel drivers expose in sysfs: amdgpu's busy percent,
+    DPM clock tables and VRAM counters, the i915 and xe frequency files and
+    the card's hwmon temperature and power. Like SensorRegistry the file
+    list is discovered once, cached in the runtime directory while the set
+    of cards is unchanged, and read through held fds. The proprietary
+    nvidia driver exposes none of this in sysfs, so its cards only get a
+    name.
+    """
+
+    # driver: [(metric, path relative to /sys/class/drm/cardN, parser)]
+    SOURCES = {
+        "amdgpu": [
+            ("busy", "device/gpu_busy_percent", "int"),
+            ("freq", "device/pp_dpm_sclk", "dpm"),
+            ("max_freq", "device/pp_dpm_sclk", "dpm_max"),
+            ("mem_freq", "device/pp_dpm_mclk", "dpm"),
+            ("vram_used", "device/mem_info_vram_used", "int"),
+            ("vram_total", "device/mem_info_vram_total", "int"),
+        ],
+        "i915": [
+            ("freq", "gt_act_freq_mhz", "int"),
+            ("max_freq", "gt_max_freq_mhz", "int"),
+        ],
+        "xe": [
+            ("freq", "device/tile0/gt0/freq0/act_freq", "int"),
+            ("max_freq", "device/tile0/gt0/freq0/max_freq", "int"),
+        ],
+    }
+    # hwmon inputs of the card: (metric, candidate files, parser)
+    HWMON = [
+        ("temp", ("temp1_input",), "milli"),
+        ("power", ("power1_average", "power1_input"), "micro"),
+    ]
+    PARSERS = {
+        "int": int,
+        "milli": lambda text: int(text) / 1000,
+        "micro": lambda text: int(text) / 1_000_000,
+        "dpm": parse_dpm,
+        "dpm_max": lambda text: parse_dpm(text, maximum=True),
+    }
+
+    def __init__(self, sys_root="/sys", cache_file=None):
+        self.sys_root = sys_root
+        self.cache_file = cache_file or runtime_file("gpus")
+        self.cards = {}
+        self.sources = []
+        for card, driver, metric, path, parser in self.load():
+            self.cards.setdefault(card, driver)
+            if not metric:
+                continue
+            try:
+                self.sources.append((card, metric, parser, ProcFile(path)))
+            except OSError:
+                continue
+
+    def card_names(self):
+        try:
+            names = os.listdir(os.path.join(self.sys_root, "class", "drm"))
+        except OSError:
+            return []
+        # Connectors such as card0-DP-1 sit next to the cards
+        return sorted(n for n in names if n.startswith("card") and n[4:].isdigit())
+
+    def load(self):
+        """(card, driver, metric, path, parser) list, cached like the sensors"""
+        key = f"{self.sys_root}:{','.join(self.card_names())}"
+        try:
+            with open(self.cache_file, "r") as f:
+                if f.readline().rstrip("\n") == key:
+                    return [tuple(line.rstrip("\n").split("\t")) for line in f]
+        except OSError:
+            pass
+
+        sources = self.discover()
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), mode=0o700, exist_ok=True)
+            tmp = f"{self.cache_file}.{os.getpid()}"
+            with open(tmp, "w") as f:
+                f.write(f"{key}\n")
+                f.writelines("\t".join(source) + "\n" for source in sources)
+            os.replace(tmp, self.cache_file)
+        except OSError:
+            pass
+        return sources
+
+    def discover(self):
+        """Find the metric files each card's driver provides"""
+        sources = []
+        for card in self.card_names():
+            base = os.path.join(self.sys_root, "class", "drm", card)
+            try:
+                driver = os.path.basename(os.readlink(os.path.join(base, "device", "driver")))
+            except OSError:
+                driver = "unknown"
+            # A placeholder row keeps cards without readable metrics listed
+            sources.append((card, driver, "", "", ""))
+            for metric, relative, parser in self.SOURCES.get(driver, []):
+                path = os.path.join(base, relative)
+                if os.path.exists(path):
+                    sources.append((card, driver, metric, path, parser))
+
+            hwmon_dir = os.path.join(base, "device", "hwmon")
+            try:
+                hwmons = sorted(os.listdir(hwmon_dir))
+            except OSError:
+                hwmons = []
+            for metric, names, parser in self.HWMON:
+                found = [
+                    os.path.join(hwmon_dir, hwmon, name)
+                    for hwmon in hwmons
+                    for name in names
+                    if os.path.exists(os.path.join(hwmon_dir, hwmon, name))
+                ]
+                if found:
+                    sources.append((card, driver, metric, found[0], parser))
+        return sources
+
+    def read(self):
+        """One dict per card: card, driver and every metric that answered
+
+        Frequencies are in MHz, VRAM in bytes, temperature in °C and power
+        in W.
+        """
+        gpus = {card: {"card": card, "driver": driver} for card, driver in self.cards.items()}
+        for card, metric, parser, source in self.sources:
+            try:
+                gpus[card][metric] = self.PARSERS[parser](source.read())
+            except (OSError, ValueError):
+                # Runtime-suspended dGPUs refuse reads until they wake up
+                continue
+        return list(gpus.values())
+
+    def primary(self, gpus=None):
+        """The card reporting the most metrics (the one in use), or None"""
+        gpus = self.read() if gpus is None else gpus
+        return max(gpus, key=len, default=None)
+
+    def close(self):
+        for _, _, _, source in self.sources:
+            source.close()
+
+
+# Filesystems without storage of their own, plus network ones whose statvfs
+# can hang for seconds when the server is gone
+PSEUDO_FILESYSTEMS = {
+    "autofs", "binfmt_misc", "bpf", "cgroup", "cgroup2", "configfs", "debugfs",
+    "devpts", "devtmpfs", "efivarfs", "fusectl", "hugetlbfs", "mqueue", "nsfs",
+    "overlay", "proc", "pstore", "ramfs", "rpc_pipefs", "securityfs", "selinuxfs",
+    "squashfs", "sysfs", "tmpfs", "tracefs",
+    "9p", "afs", "ceph", "cifs", "nfs", "nfs4", "smb3", "sshfs",
+}
+SECTOR_SIZE = 512
+
+
+def unescape_mount(field):
+    """mountinfo writes space, tab, newline and backslash as \\ooo"""
+    parts = field.split("\\")
+    return parts[0] + "".join(chr(int(part[:3], 8)) + part[3:] for part in parts[1:])
+
+
+def parse_mountinfo(text):
+    """(mount point, filesystem type, source, "major:minor") of real mounts
+
+    Bind mounts and btrfs subvolumes of an already listed device are left
+    out, so every filesystem is reported once, at its first mount point.
+    """
+    mounts = []
+    devices = set()
+    for line in text.splitlines():
+        fields = line.split()
+        try:
+            separator = fields.index("-")
+        except ValueError:
+            continue
+        device, mount_point = fields[2], unescape_mount(fields[4])
+        fs_type, source = fields[separator + 1], unescape_mount(fields[separator + 2])
+        if fs_type in PSEUDO_FILESYSTEMS or fs_type.startswith("fuse."):
+            continue
+        if device in devices:
+            continue
+        devices.add(device)
+        mounts.append((mount_point, fs_type, source, device))
+    return mounts
+
+
+def block_device(source):
+    """ "major:minor" of the block device a mount source names, or None
+
+    btrfs (and other filesystems spanning devices) report an anonymous
+    0:N device in mountinfo, which /proc/diskstats does not know.
+    """
+    try:
+        stat = os.stat(source)
+    except (OSError, ValueError):
+        return None
+    if not S_ISBLK(stat.st_mode):
+        return None
+    return f"{os.major(stat.st_rdev)}:{os.minor(stat.st_rdev)}"
+
+
+def filesystem_usage(path):
+    """Total, used and free bytes of a mounted filesystem, like df"""
+    stat = os.statvfs(path)
+    total = stat.f_blocks * stat.f_frsize
+    used = (stat.f_blocks - stat.f_bfree) * stat.f_frsize
+    free = stat.f_bavail * stat.f_frsize
+    # Percent of the space available to users, leaving out root's reserve
+    return {
+        "total": total,
+        "used": used,
+        "free": free,
+        "percent": 100 * used / (used + free) if used + free else 0.0,
+    }
+
+
+def parse_diskstats(text):
+    """{"major:minor": (name, sectors read, sectors written, ms busy)}"""
+    stats = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 14:
+            continue
+        stats[f"{fields[0]}:{fields[1]}"] = (
+            fields[2],
+            int(fields[5]),
+            int(fields[9]),
+            int(fields[12]),
+        )
+    return stats
+
+
+class DiskMonitor:
+    """Usage of every real mount and the I/O of the device behind it
+
+    Mounts come from /proc/self/mountinfo and usage from statvfs, so no df
+    is spawned. Read/write rates and utilisation are /proc/diskstats deltas
+    (see CounterSnapshot).
+    """
+
+    def __init__(self, proc_root="/proc", snapshot_file=None):
+        self.mountinfo = ProcFile(os.path.join(proc_root, "self", "mountinfo"))
+        try:
+            self.diskstats = CounterSnapshot(
+                os.path.join(proc_root, "diskstats"),
+                parse_diskstats,
+                snapshot_file or runtime_file("diskstats-snapshot"),
+            )
+        except OSError:
+            self.diskstats = None
+
+    def io_rates(self, min_age=0.1):
+        """{"major:minor": (name, read B/s, write B/s, busy %)}"""
+        if self.diskstats is None:
+            return {}
+        elapsed, previous, current = self.diskstats.read(min_age)
+        rates = {}
+        for device, (name, read, written, busy) in current.items():
+            before = previous.get(device)
+            if before is None or before[0] != name:
+                continue
+            rates[device] = (
+                name,
+                (read - before[1]) * SECTOR_SIZE / elapsed,
+                (written - before[2]) * SECTOR_SIZE / elapsed,
+                min(100.0, (busy - before[3]) / (10 * elapsed)),
+            )
+        return rates
+
+    def update(self, min_age=0.1):
+        """One dict per mount: mount, type, source, device, usage and I/O"""
+        rates = self.io_rates(min_age)
+        disks = []
+        for mount_point, fs_type, source, device in parse_mountinfo(
+            self.mountinfo.read()
+        ):
+            try:
+                usage = filesystem_usage(mount_point)
+            except OSError:
+                continue
+            if not usage["total"]:
+                continue
+            if device not in rates and device.startswith("0:"):
+                device = block_device(source) or device
+            name, read, write, busy = rates.get(device, (None, None, None, None))
+            usage.update(
+                mount=mount_point,
+                type=fs_type,
+                source=source,
+                device=name,
+                read=read,
+                write=write,
+                util=busy,
+            )
+            disks.append(usage)
+        return disks
+
+    def close(self):
+        self.mountinfo.close()
+        if self.diskstats:
+            self.diskstats.close()
+
+
+def parse_net_dev(text):
+    """{interface: (rx bytes, rx packets, rx errors, rx drops,
+                    tx bytes, tx packets, tx errors, tx drops)}"""
+    interfaces = {}
+    for line in text.splitlines()[2:]:
+        name, _, counters = line.partition(":")
+        fields = counters.split()
+        if len(fields) < 12:
+            continue
+        interfaces[name.strip()] = tuple(
+            int(fields[i]) for i in (0, 1, 2, 3, 8, 9, 10, 11)
+        )
+    return interfaces
+
+
+class NetworkMonitor:
+    """Per-interface throughput from /proc/net/dev deltas (see CounterSnapshot)"""
+
+    def __init__(self, proc_root="/proc", snapshot_file=None):
+        self.netdev = CounterSnapshot(
+            os.path.join(proc_root, "net", "dev"),
+            parse_net_dev,
+            snapshot_file or runtime_file("netdev-snapshot"),
+        )
+
+    def update(self, min_age=0.1):
+        """One dict per interface that has carried traffic, loopback excluded
+
+        Rates are per second; errors and drops are totals since boot.
+        """
+        elapsed, previous, current = self.netdev.read(min_age)
+        interfaces = []
+        for name, counters in current.items():
+            before = previous.get(name)
+            if name == "lo" or before is None or not (counters[0] or counters[4]):
+                continue
+            # Counters restart when a driver is reloaded
+            delta = [max(0, now - then) / elapsed for now, then in zip(counters, before)]
+            interfaces.append(
+                {
+                    "name": name,
+                    "rx": delta[0],
+                    "tx": delta[4],
+                    "rx_packets": delta[1],
+                    "tx_packets": delta[5],
+                    "rx_errors": counters[2],
+                    "tx_errors": counters[6],
+                    "rx_drops": counters[3],
+                    "tx_drops": counters[7],
+                }
+            )
+        interfaces.sort(key=lambda i: i["rx"] + i["tx"], reverse=True)
+        return interfaces
+
+    def close(self):
+        self.netdev.close()
@@ -8,6 +8,8 @@ import subprocess
 import sys
 import os
 
+import desktop_notify
+
 class QuickLauncher:
     def __init__(self):
         self.apps = {
@@ -55,12 +57,10 @@ class QuickLauncher:
     
     def notify(self, message, title="Quick Launcher"):
         """Send desktop notification"""
-        try:
-            subprocess.run([
-                "notify-send", "-i", "applications-system",
-                "-t", "2000", title, message
-            ], check=False)
-        except FileNotFoundError:
+        if not desktop_notify.notify(
+            message, title, icon="applications-system",
+            timeout=2000, channel="launcher"
+        ):
             print(f"🚀 {title}: {message}")
     
     def launch_app(self, app_key):
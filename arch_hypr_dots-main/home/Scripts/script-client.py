@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Script Client
+Forward a ~/Scripts command to the warm script server, or run it cold when
+the server is not up. Usage: script-client.py <script.py> [args...]
+
+Only builtin C modules are imported here (no socket, json or signal wrappers)
+since every millisecond of client startup is paid on each launch.
+"""
+
+import _signal
+import _socket
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def socket_path():
+    """Location of the server socket (kept in sync with script-server.py)"""
+    override = os.environ.get("CHOSO_SCRIPT_SERVER")
+    if override:
+        return override
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/tmp/choso-{os.getuid()}")
+    return os.path.join(runtime_dir, "choso", "script-server.sock")
+
+
+def run_cold(argv):
+    """Replace this process with a normal interpreter launch"""
+    script = os.path.join(SCRIPT_DIR, os.path.expanduser(argv[0]))
+    os.execv(sys.executable, [sys.executable, script] + argv[1:])
+
+
+def encode_request(argv):
+    """NUL-separated cwd, argc, argv and environment"""
+    fields = [os.getcwd(), str(len(argv))] + argv
+    fields += [f"{key}={value}" for key, value in os.environ.items()]
+    return "\0".join(fields).encode("utf-8", "surrogateescape")
+
+
+def main():
+    argv = sys.argv[1:]
+    if not argv:
+        print("Usage: script-client.py <script.py> [args...]")
+        return 2
+
+    conn = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        conn.connect(socket_path())
+    except OSError:
+        run_cold(argv)
+
+    request = encode_request(argv)
+    fds = b"".join(fd.to_bytes(4, sys.byteorder) for fd in (0, 1, 2))
+    conn.sendmsg(
+        [len(request).to_bytes(4, "big")],
+        [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)],
+    )
+    conn.sendall(request)
+
+    # The server answers with "pid <child pid>\n" and, when the child is
+    # done, "exit <code>\n"
+    pid = None
+    reply = b""
+
+    def forward(signum, _frame):
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            pass
+
+    def suspend(_signum, _frame):
+        # The child is not in the terminal's process group: stop it, then
+        # ourselves so the shell sees the job stopped, and resume both on fg
+        forward(_signal.SIGTSTP, None)
+        os.kill(os.getpid(), _signal.SIGSTOP)
+        forward(_signal.SIGCONT, None)
+
+    while True:
+        while b"\n" not in reply:
+            chunk = conn.recv(64)
+            if not chunk:
+                if pid is None:
+                    run_cold(argv)
+                return 1
+            reply += chunk
+        line, reply = reply.split(b"\n", 1)
+        tag, _, value = line.partition(b" ")
+        if tag == b"exit":
+            return int(value)
+        if tag == b"pid" and pid is None:
+            pid = int(value)
+            for signum in (
+                _signal.SIGINT, _signal.SIGTERM, _signal.SIGHUP, _signal.SIGWINCH
+            ):
+                _signal.signal(signum, forward)
+            _signal.signal(_signal.SIGTSTP, suspend)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Warm Script Server
+Keeps an interpreter with the shared modules already imported and forks a
+child per request, so short scripts skip Python startup. Only the shell
+banner goes through it: script-server.py --benchmark shows no gain for
+commands whose time goes into their own work. Use script-client.py to talk
+to it.
+"""
+
+import os
+import runpy
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import types
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules imported by performance-manager, window-manager, gesture-manager,
+# quick-launcher, wallpaper-switcher, system-info and the banner
+PRELOAD_MODULES = [
+    "datetime",
+    "json",
+    "pathlib",
+    "random",
+    "subprocess",
+    "threading",
+    "time",
+    "psutil",
+    "desktop_notify",
+    "metrics_ring",
+    "jeepney",
+    "jeepney.io.blocking",
+]
+
+# Read-only commands the keybinds and shell run (minus --notify), used by --benchmark
+BENCHMARK_COMMANDS = [
+    ["system-info.py"],
+    ["system-info-simple.py"],
+    ["performance-manager.py", "--status"],
+    ["choso-animated-banner.py", "--static"],
+]
+
+
+def socket_path():
+    """Location of the server socket"""
+    override = os.environ.get("CHOSO_SCRIPT_SERVER")
+    if override:
+        return override
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR", f"/tmp/choso-{os.getuid()}")
+    return os.path.join(runtime_dir, "choso", "script-server.sock")
+
+
+def recv_request(conn, maxfds=3):
+    """Read one request from script-client.py plus its passed stdio fds"""
+    data, fds = b"", []
+    header, new_fds, _, _ = socket.recv_fds(conn, 4, maxfds)
+    fds += new_fds
+    if len(header) < 4:
+        raise ConnectionError("short header")
+    size = int.from_bytes(header, "big")
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+
+    fields = data.decode("utf-8", "surrogateescape").split("\0")
+    argc = int(fields[1])
+    request = {
+        "cwd": fields[0],
+        "argv": fields[2 : 2 + argc],
+        "env": dict(
+            field.split("=", 1) for field in fields[2 + argc :] if "=" in field
+        ),
+    }
+    return request, fds
+
+
+class ScriptServer:
+    def __init__(self, path=None):
+        self.path = path or socket_path()
+        self.listener = None
+        self.code_cache = {}
+
+    def preload(self):
+        """Import the shared modules once so every child inherits them"""
+        for name in PRELOAD_MODULES:
+            try:
+                __import__(name)
+            except ImportError:
+                pass
+
+        for command in BENCHMARK_COMMANDS:
+            self.load_code(os.path.join(SCRIPT_DIR, command[0]))
+
+    def load_code(self, script):
+        """Compile a script once per modification time, None if that fails"""
+        try:
+            mtime = os.stat(script).st_mtime_ns
+            cached = self.code_cache.get(script)
+            if cached and cached[0] == mtime:
+                return cached[1]
+            with open(script, "rb") as f:
+                code = compile(f.read(), script, "exec")
+        except (OSError, SyntaxError, ValueError):
+            return None
+        self.code_cache[script] = (mtime, code)
+        return code
+
+    def bind(self):
+        """Create the listening socket, replacing a stale one"""
+        os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+            print(f"❌ Script server already running on {self.path}")
+            return False
+        except OSError:
+            pass
+        finally:
+            probe.close()
+
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self.listener.listen(16)
+        return True
+
+    def serve_forever(self):
+        """Accept requests and fork a child for each one"""
+        if not self.bind():
+            return False
+        self.preload()
+
+        # Children are never waited for by the server itself
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+        try:
+            while True:
+                conn, _ = self.listener.accept()
+                try:
+                    request, fds = recv_request(conn)
+                except (OSError, ValueError):
+                    conn.close()
+                    continue
+
+                # Compile in the parent so the next fork inherits the code object
+                script = os.path.join(SCRIPT_DIR, os.path.expanduser(request["argv"][0]))
+                code = self.load_code(script)
+
+                if os.fork() == 0:
+                    self.listener.close()
+                    self.run_child(conn, request, fds, script, code)
+
+                conn.close()
+                for fd in fds:
+                    os.close(fd)
+        finally:
+            self.listener.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    def run_child(self, conn, request, fds, script, code):
+        """Run one script in the forked child and report its exit code
+
+        Replies are tagged lines: "pid <pid>" first, "exit <code>" at the end.
+        """
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+        status = 1
+        try:
+            # Before anything that can fail, so the client can signal us
+            conn.sendall(f"pid {os.getpid()}\n".encode())
+            for target, fd in enumerate(fds[:3]):
+                os.dup2(fd, target)
+                os.close(fd)
+            sys.stdin = os.fdopen(0, "r", closefd=False)
+            sys.stdout = os.fdopen(1, "w", buffering=1, closefd=False)
+            sys.stderr = os.fdopen(2, "w", buffering=1, closefd=False)
+
+            os.chdir(request.get("cwd", SCRIPT_DIR))
+            os.environ.clear()
+            os.environ.update(request.get("env", {}))
+
+            sys.argv = [script] + request["argv"][1:]
+            sys.path[0] = os.path.dirname(script)
+
+            try:
+                if code is None:
+                    # Let runpy raise the real error for unreadable scripts
+                    runpy.run_path(script, run_name="__main__")
+                else:
+                    module = types.ModuleType("__main__")
+                    module.__file__ = script
+                    sys.modules["__main__"] = module
+                    exec(code, module.__dict__)
+                status = 0
+            except SystemExit as e:
+                if e.code is None:
+                    status = 0
+                elif isinstance(e.code, int):
+                    status = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+            except KeyboardInterrupt:
+                status = 130
+            except BaseException:
+                traceback.print_exc()
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                conn.sendall(f"exit {status}\n".encode())
+            except Exception:
+                pass
+            os._exit(status)
+
+
+def time_command(command, runs, env=None):
+    """Median wall time of a command in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def benchmark(runs=20):
+    """Compare cold interpreter launches with warm forks"""
+    client = os.path.join(SCRIPT_DIR, "script-client.py")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, CHOSO_SCRIPT_SERVER=os.path.join(tmp, "bench.sock"))
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__)], env=env)
+        try:
+            for _ in range(100):
+                if os.path.exists(env["CHOSO_SCRIPT_SERVER"]):
+                    break
+                time.sleep(0.05)
+
+            print(f"⏱️ Cold vs warm launch latency (median of {runs} runs)")
+            print(f"{'Command':<36}{'Cold':>10}{'Warm':>10}{'Speedup':>10}")
+            for command in BENCHMARK_COMMANDS:
+                script = os.path.join(SCRIPT_DIR, command[0])
+                cold = time_command([sys.executable, script] + command[1:], runs)
+                warm = time_command([sys.executable, client] + command, runs, env)
+                print(
+                    f"{' '.join(command):<36}{cold:>8.1f}ms{warm:>8.1f}ms"
+                    f"{cold / warm:>9.1f}x"
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+        benchmark(runs)
+    elif len(sys.argv) > 1:
+        print("Usage: script-server.py [--benchmark [runs]]")
+    else:
+        ScriptServer().serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Startup Time Audit
+Measure import time (-X importtime) and time-to-first-output for every
+~/Scripts entry point, and fail with --check when one exceeds its budget
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# (script, args, import budget ms, first output budget ms)
+# Only side-effect free invocations: usage text, status and dashboards
+ENTRY_POINTS = [
+    ("choso-animated-banner.py", ["--static"], 15, 60),
+    ("system-info.py", [], 15, 60),
+    ("system-info-simple.py", [], 15, 60),
+    ("performance-manager.py", ["--help"], 30, 80),
+    ("performance-manager.py", ["--status"], 30, 80),
+    ("window-manager.py", ["--help"], 35, 90),
+    ("gesture-manager.py", ["--help"], 30, 80),
+]
+
+
+def top_level_imports(command):
+    """(cumulative ms, module) for each top-level import a command performs"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        timeout=30,
+    )
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented by two extra spaces per level
+        if cumulative.strip().isdigit() and name[1:2] != " ":
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return imports
+
+
+def measure_imports(script, args, startup_modules):
+    """Import time of one entry point in ms and its three heaviest imports"""
+    imports = [
+        (ms, name)
+        for ms, name in top_level_imports([os.path.join(SCRIPT_DIR, script)] + args)
+        if name not in startup_modules
+    ]
+    imports.sort(reverse=True)
+    return sum(ms for ms, _ in imports), imports[:3]
+
+
+def measure_first_output(script, args):
+    """Milliseconds from exec until the first byte on stdout"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(SCRIPT_DIR, script)] + args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    proc.stdout.read(1)
+    elapsed = (time.perf_counter() - start) * 1000
+    proc.kill()
+    proc.communicate()
+    return elapsed
+
+
+def audit(runs=5, check=False):
+    """Print the audit table, return False if any budget is exceeded"""
+    ok = True
+    # Whatever a bare interpreter imports is not the script's fault
+    startup_modules = {name for _, name in top_level_imports(["-c", "pass"])}
+
+    print(f"⏱️ Startup audit (median of {runs} runs)")
+    print(f"{'Entry point':<40}{'Imports':>12}{'First out':>12}  Heaviest imports")
+
+    for script, args, import_budget, output_budget in ENTRY_POINTS:
+        imports = [
+            measure_imports(script, args, startup_modules) for _ in range(runs)
+        ]
+        import_ms = statistics.median(total for total, _ in imports)
+        output_ms = statistics.median(
+            measure_first_output(script, args) for _ in range(runs)
+        )
+
+        over = import_ms > import_budget or output_ms > output_budget
+        ok = ok and not over
+        heaviest = ", ".join(f"{name} {ms:.1f}" for ms, name in imports[-1][1])
+        print(
+            f"{'❌' if over else '✅'} {' '.join([script] + args):<37}"
+            f"{import_ms:>8.1f}/{import_budget:<3}{output_ms:>8.1f}/{output_budget:<3}"
+            f"  {heaviest}"
+        )
+
+    if check and not ok:
+        print("❌ Startup budget exceeded")
+    return ok
+
+
+def main():
+    check = "--check" in sys.argv
+    runs = 5
+    if "--runs" in sys.argv:
+        runs = int(sys.argv[sys.argv.index("--runs") + 1])
+    ok = audit(runs, check)
+    sys.exit(0 if ok or not check else 1)
+
+
+if __name__ == "__main__":
+    main()
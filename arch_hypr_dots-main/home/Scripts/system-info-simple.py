@@ -1,17 +1,25 @@
 #!/usr/bin/env python3
 """
 Simple System Info Display
-Basic system information using standard Unix tools (no psutil dependency)
+Basic system information read from /proc and /sys (no psutil dependency)
 """
 
-import subprocess
 import os
 import sys
 from datetime import datetime, timedelta
 
+import metrics_ring
+
 class SimpleSystemInfo:
     def __init__(self):
         self.hostname = os.uname().nodename
+        # Latest sample from metrics-collector.py, None when it isn't running
+        self.sample = metrics_ring.latest()
+        # Kept between refreshes in --watch mode
+        self.cpu_tracker = None
+        self.sensors = None
+        self.disk_monitor = None
+        self.network_monitor = None
         
     def get_uptime(self):
         """Get system uptime"""
@@ -26,30 +34,65 @@ class SimpleSystemInfo:
         except:
             return "Unknown"
     
-    def get_cpu_info(self):
-        """Get CPU information using /proc/stat"""
+    def get_cpu_info(self, interval=0.1):
+        """Get current total and per-core CPU usage from two /proc/stat snapshots
+
+        The first call waits interval seconds between them; later calls
+        (--watch) compare against the previous call instead.
+        """
+        if self.sample:
+            freq = self.sample["cpu_freq"]
+            per_core = metrics_ring.core_usage(self.sample)
+            return {
+                "usage": self.sample["cpu"] or 0,
+                "cores": len(per_core),
+                "frequency": f"{freq:.0f}MHz" if freq else "N/A",
+                "per_core": [core or 0 for core in per_core],
+                "iowait": None,
+                "steal": None
+            }
         try:
-            # Get CPU usage from /proc/stat
-            with open('/proc/stat', 'r') as f:
-                line = f.readline()
-                cpu_times = [int(x) for x in line.split()[1:]]
-                idle = cpu_times[3]
-                total = sum(cpu_times)
-                usage = 100 * (1 - idle / total) if total > 0 else 0
+            if self.cpu_tracker is None:
+                import time
+                from proc_metrics import CpuUsageTracker
+
+                self.cpu_tracker = CpuUsageTracker()
+                time.sleep(interval)
+            usage = self.cpu_tracker.update()
+            if usage is None:
+                # A core went on- or offline in between
+                raise ValueError("cpu lines changed")
+            names = self.cpu_tracker.names
             
-            # Get CPU count
-            cpu_count = len([line for line in open('/proc/cpuinfo') if line.startswith('processor')])
+            try:
+                cpu_count = len(os.sched_getaffinity(0))
+            except AttributeError:
+                cpu_count = os.cpu_count()
             
             return {
-                "usage": usage,
+                "usage": usage["cpu"]["usage"],
                 "cores": cpu_count,
-                "frequency": "N/A"
+                "frequency": "N/A",
+                "per_core": [usage[name]["usage"] for name in names[1:]],
+                "iowait": usage["cpu"]["iowait"],
+                "steal": usage["cpu"]["steal"]
             }
         except:
-            return {"usage": 0, "cores": "N/A", "frequency": "N/A"}
+            return {"usage": 0, "cores": "N/A", "frequency": "N/A", "per_core": [], "iowait": None, "steal": None}
     
     def get_memory_info(self):
         """Get memory information using /proc/meminfo"""
+        if self.sample:
+            swap_total = self.sample["swap_total"] or 0
+            return {
+                "total": self.bytes_to_gb(self.sample["mem_total"]),
+                "used": self.bytes_to_gb(self.sample["mem_used"]),
+                "available": self.bytes_to_gb(self.sample["mem_total"] - self.sample["mem_used"]),
+                "percent": self.sample["mem_percent"] or 0,
+                "swap_total": self.bytes_to_gb(swap_total),
+                "swap_used": self.bytes_to_gb(self.sample["swap_used"] or 0),
+                "swap_percent": 100 * self.sample["swap_used"] / swap_total if swap_total else 0
+            }
         try:
             meminfo = {}
             with open('/proc/meminfo', 'r') as f:
@@ -79,41 +122,40 @@ class SimpleSystemInfo:
             return {"total": 0, "used": 0, "available": 0, "percent": 0, "swap_total": 0, "swap_used": 0, "swap_percent": 0}
     
     def get_disk_info(self):
-        """Get disk information using df command"""
+        """Usage and I/O of every mounted filesystem, without spawning df"""
         try:
-            result = subprocess.run(['df', '/'], capture_output=True, text=True)
-            lines = result.stdout.strip().split('\n')
-            if len(lines) >= 2:
-                parts = lines[1].split()
-                if len(parts) >= 4:
-                    total = int(parts[1]) * 1024  # Convert from 1K blocks to bytes
-                    used = int(parts[2]) * 1024
-                    available = int(parts[3]) * 1024
-                    percent = (used / total * 100) if total > 0 else 0
-                    
-                    return {
-                        "total": self.bytes_to_gb(total),
-                        "used": self.bytes_to_gb(used),
-                        "free": self.bytes_to_gb(available),
-                        "percent": percent
-                    }
-        except:
-            pass
-        return {"total": 0, "used": 0, "free": 0, "percent": 0}
+            if self.disk_monitor is None:
+                from proc_metrics import DiskMonitor
+                self.disk_monitor = DiskMonitor()
+            disks = self.disk_monitor.update()
+        except OSError:
+            return []
+        for disk in disks:
+            for key in ("total", "used", "free"):
+                disk[key] = self.bytes_to_gb(disk[key])
+        return disks
+    
+    def get_network_info(self):
+        """Per-interface rates from two /proc/net/dev readings"""
+        try:
+            if self.network_monitor is None:
+                from proc_metrics import NetworkMonitor
+                self.network_monitor = NetworkMonitor()
+            return self.network_monitor.update()
+        except OSError:
+            return []
     
     def get_temperature(self):
-        """Get CPU temperature from /sys/class/thermal"""
+        """Get CPU temperature from hwmon / thermal zones"""
+        if self.sample and self.sample["temp"] is not None:
+            return f"{self.sample['temp']:.1f}°C"
         try:
-            temp_paths = [
-                '/sys/class/thermal/thermal_zone0/temp',
-                '/sys/class/thermal/thermal_zone1/temp'
-            ]
-            
-            for path in temp_paths:
-                if os.path.exists(path):
-                    with open(path, 'r') as f:
-                        temp = int(f.read().strip()) / 1000  # Convert millidegree to degree
-                        return f"{temp:.1f}°C"
+            if self.sensors is None:
+                from proc_metrics import SensorRegistry
+                self.sensors = SensorRegistry()
+            temp = self.sensors.cpu_temperature()
+            if temp is not None:
+                return f"{temp:.1f}°C"
         except:
             pass
         return "N/A"
@@ -122,6 +164,14 @@ class SimpleSystemInfo:
         """Convert bytes to GB"""
         return round(bytes_val / (1024**3), 2)
     
+    def format_rate(self, bytes_per_sec):
+        """Human readable transfer rate"""
+        for unit in ("B", "KB", "MB"):
+            if bytes_per_sec < 1024:
+                return f"{bytes_per_sec:.1f}{unit}/s"
+            bytes_per_sec /= 1024
+        return f"{bytes_per_sec:.1f}GB/s"
+    
     def get_progress_bar(self, percent, width=20):
         """Create a text progress bar"""
         filled = int(width * percent / 100)
@@ -130,54 +180,106 @@ class SimpleSystemInfo:
     
     def display_dashboard(self):
         """Display the complete system dashboard"""
-        print("🖥️  SIMPLE SYSTEM DASHBOARD")
-        print("=" * 50)
+        for line in self.dashboard_lines():
+            print(line)
+    
+    def watch(self, interval=1.0):
+        """Live dashboard that keeps its collectors warm between refreshes"""
+        import term_render
+
+        def frame():
+            self.sample = metrics_ring.latest()
+            return self.dashboard_lines()
+
+        term_render.watch(frame, interval)
+    
+    def dashboard_lines(self):
+        """Lines of the dashboard, produced as each section is collected"""
+        yield "🖥️  SIMPLE SYSTEM DASHBOARD"
+        yield "=" * 50
         
         # Basic info
-        print(f"🏠 Hostname: {self.hostname}")
-        print(f"⏰ Uptime: {self.get_uptime()}")
-        print(f"📅 Date: {datetime.now().strftime('%A, %B %d, %Y %H:%M:%S')}")
-        print()
+        yield f"🏠 Hostname: {self.hostname}"
+        yield f"⏰ Uptime: {self.get_uptime()}"
+        yield f"📅 Date: {datetime.now().strftime('%A, %B %d, %Y %H:%M:%S')}"
+        yield ""
         
         # CPU Info
         cpu = self.get_cpu_info()
-        print(f"🔧 CPU: {cpu['cores']} cores @ {cpu['frequency']}")
-        print(f"   Usage: {self.get_progress_bar(cpu['usage'])}")
-        print(f"   Temperature: {self.get_temperature()}")
-        print()
+        yield f"🔧 CPU: {cpu['cores']} cores @ {cpu['frequency']}"
+        yield f"   Usage: {self.get_progress_bar(cpu['usage'])}"
+        if cpu['per_core']:
+            yield f"   Cores: {' '.join(f'{core:.0f}%' for core in cpu['per_core'])}"
+        if cpu['iowait'] is not None:
+            yield f"   I/O wait: {cpu['iowait']:.1f}% | Steal: {cpu['steal']:.1f}%"
+        yield f"   Temperature: {self.get_temperature()}"
+        yield ""
         
         # Memory Info
         memory = self.get_memory_info()
-        print(f"💾 Memory: {memory['used']}GB / {memory['total']}GB")
-        print(f"   Usage: {self.get_progress_bar(memory['percent'])}")
-        print()
+        yield f"💾 Memory: {memory['used']}GB / {memory['total']}GB"
+        yield f"   Usage: {self.get_progress_bar(memory['percent'])}"
+        yield ""
         
         # Disk Info
-        disk = self.get_disk_info()
-        print(f"💿 Disk: {disk['used']}GB / {disk['total']}GB")
-        print(f"   Usage: {self.get_progress_bar(disk['percent'])}")
-        print(f"   Free: {disk['free']}GB")
-        print()
+        disks = self.get_disk_info()
+        yield "💿 Disks:"
+        for disk in disks:
+            yield f"   {disk['mount']} ({disk['type']}): {disk['used']}GB / {disk['total']}GB, {disk['free']}GB free"
+            yield f"      Usage: {self.get_progress_bar(disk['percent'])}"
+            if disk['read'] is not None:
+                yield (
+                    f"      I/O: read {self.format_rate(disk['read'])} | "
+                    f"write {self.format_rate(disk['write'])} | {disk['util']:.0f}% busy"
+                )
+        if not disks:
+            yield "   No mounted disks found"
+        yield ""
+        
+        # Network Info
+        interfaces = self.get_network_info()
+        if interfaces:
+            yield "🌐 Network:"
+            for interface in interfaces:
+                yield (
+                    f"   {interface['name']}: ⬇ {self.format_rate(interface['rx'])} "
+                    f"({interface['rx_packets']:.0f} pkt/s) | "
+                    f"⬆ {self.format_rate(interface['tx'])} ({interface['tx_packets']:.0f} pkt/s)"
+                )
+                errors = interface['rx_errors'] + interface['tx_errors']
+                drops = interface['rx_drops'] + interface['tx_drops']
+                if errors or drops:
+                    yield (
+                        f"      Errors: {interface['rx_errors']} rx / {interface['tx_errors']} tx | "
+                        f"Drops: {interface['rx_drops']} rx / {interface['tx_drops']} tx"
+                    )
+            yield ""
         
-        print("💡 Note: This is a simplified version. Install python-psutil for detailed system info.")
+        yield "💡 Note: This is a simplified version. Install python-psutil for detailed system info."
 
 def main():
     system_info = SimpleSystemInfo()
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--notify":
+    if len(sys.argv) > 1 and sys.argv[1] == "--watch":
+        interval = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+        system_info.watch(interval)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--notify":
         # Send a notification with basic info
         cpu = system_info.get_cpu_info()
         memory = system_info.get_memory_info()
         temp = system_info.get_temperature()
+        interfaces = system_info.get_network_info()
         
         message = f"CPU: {cpu['usage']:.1f}% | RAM: {memory['percent']:.1f}% | Temp: {temp}"
+        if interfaces:
+            rx = sum(i['rx'] for i in interfaces)
+            tx = sum(i['tx'] for i in interfaces)
+            message += f" | Net: ⬇ {system_info.format_rate(rx)} ⬆ {system_info.format_rate(tx)}"
         
-        try:
-            subprocess.run([
-                "notify-send", "-i", "computer",
-                "-t", "5000", "System Stats", message
-            ], check=False)
-        except:
+        import desktop_notify
+        if not desktop_notify.notify(
+            message, "System Stats", icon="computer", timeout=5000, channel="system"
+        ):
             print(message)
     else:
         system_info.display_dashboard()
@@ -4,39 +4,62 @@ System Info Dashboard
 Show cool system statistics and information
 """
 
-import subprocess
 import os
 import sys
 from datetime import datetime, timedelta
 
-# Handle optional psutil import
-PSUTIL_AVAILABLE = False
-psutil = None
+import metrics_ring
 
-try:
-    import psutil  # type: ignore # pylint: disable=import-error
-    PSUTIL_AVAILABLE = True
-except ImportError:
-    # Create a mock psutil object to prevent attribute errors
-    class MockPsutil:
-        POWER_TIME_UNLIMITED = -1
-        def cpu_percent(self, interval=1): return 0
-        def cpu_count(self): return 0
-        def cpu_freq(self): return None
-        def virtual_memory(self): return type('obj', (object,), {'total': 0, 'used': 0, 'available': 0, 'percent': 0})
-        def swap_memory(self): return type('obj', (object,), {'total': 0, 'used': 0, 'percent': 0})
-        def disk_usage(self, path): return type('obj', (object,), {'total': 0, 'used': 0, 'free': 0})
-        def net_io_counters(self): return None
-        def sensors_temperatures(self): return {}
-        def sensors_battery(self): return None
-        def process_iter(self, attrs): return []
-    
-    psutil = MockPsutil()
-    PSUTIL_AVAILABLE = False
+class MockPsutil:
+    """Stand-in that prevents attribute errors when psutil is missing"""
+    POWER_TIME_UNLIMITED = -1
+    def cpu_percent(self, interval=1): return 0
+    def cpu_count(self): return 0
+    def cpu_freq(self): return None
+    def virtual_memory(self): return type('obj', (object,), {'total': 0, 'used': 0, 'available': 0, 'percent': 0})
+    def swap_memory(self): return type('obj', (object,), {'total': 0, 'used': 0, 'percent': 0})
+    def disk_usage(self, path): return type('obj', (object,), {'total': 0, 'used': 0, 'free': 0})
+    def net_io_counters(self): return None
+    def sensors_temperatures(self): return {}
+    def sensors_battery(self): return None
+    def process_iter(self, attrs): return []
+
+class LazyPsutil:
+    """Import psutil on first use so paths that never touch it (uptime,
+    headers, --help) don't pay for it; falls back to MockPsutil"""
+    _module = None
+
+    @classmethod
+    def load(cls):
+        if cls._module is None:
+            try:
+                import psutil as module  # type: ignore # pylint: disable=import-error
+            except ImportError:
+                module = MockPsutil()
+            cls._module = module
+        return cls._module
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+psutil = LazyPsutil()
+
+def psutil_available():
+    """Whether the real psutil could be imported"""
+    return not isinstance(LazyPsutil.load(), MockPsutil)
 
 class SystemInfo:
     def __init__(self):
         self.hostname = os.uname().nodename
+        # Latest sample from metrics-collector.py, None when it isn't running
+        self.sample = metrics_ring.latest()
+        # Kept between refreshes in --watch mode
+        self.cpu_tracker = None
+        self.process_tracker = None
+        self.sensors = None
+        self.disk_monitor = None
+        self.network_monitor = None
+        self.gpu_monitor = None
         
     def get_uptime(self):
         """Get system uptime"""
@@ -53,12 +76,28 @@ class SystemInfo:
     
     def get_cpu_info(self):
         """Get CPU information"""
-        if not PSUTIL_AVAILABLE:
+        if self.sample:
+            freq = self.sample["cpu_freq"]
+            return {
+                "usage": self.sample["cpu"] or 0,
+                "cores": len(metrics_ring.core_usage(self.sample)),
+                "frequency": f"{freq:.0f}MHz" if freq else "Unknown"
+            }
+        # Native delta instead of blocking in psutil.cpu_percent(interval=1);
+        # --watch keeps the tracker so later refreshes don't wait at all
+        from proc_metrics import CpuUsageTracker
+        try:
+            if self.cpu_tracker is None:
+                import time
+                self.cpu_tracker = CpuUsageTracker()
+                time.sleep(0.1)
+            usage = self.cpu_tracker.update()
+            cpu_percent = usage["cpu"]["usage"] if usage else 0
+        except OSError:
             return {"usage": 0, "cores": "N/A", "frequency": "N/A"}
-            
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count()
-        cpu_freq = psutil.cpu_freq()
+        
+        cpu_count = os.cpu_count()
+        cpu_freq = psutil.cpu_freq() if psutil_available() else None
         
         freq_str = f"{cpu_freq.current:.0f}MHz" if cpu_freq else "Unknown"
         return {
@@ -69,7 +108,18 @@ class SystemInfo:
     
     def get_memory_info(self):
         """Get memory information"""
-        if not PSUTIL_AVAILABLE:
+        if self.sample:
+            swap_total = self.sample["swap_total"] or 0
+            return {
+                "total": self.bytes_to_gb(self.sample["mem_total"]),
+                "used": self.bytes_to_gb(self.sample["mem_used"]),
+                "available": self.bytes_to_gb(self.sample["mem_total"] - self.sample["mem_used"]),
+                "percent": self.sample["mem_percent"] or 0,
+                "swap_total": self.bytes_to_gb(swap_total),
+                "swap_used": self.bytes_to_gb(self.sample["swap_used"] or 0),
+                "swap_percent": 100 * self.sample["swap_used"] / swap_total if swap_total else 0
+            }
+        if not psutil_available():
             return {"total": 0, "used": 0, "available": 0, "percent": 0, "swap_total": 0, "swap_used": 0, "swap_percent": 0}
             
         memory = psutil.virtual_memory()
@@ -86,52 +136,62 @@ class SystemInfo:
         }
     
     def get_disk_info(self):
-        """Get disk information"""
-        if not PSUTIL_AVAILABLE:
-            return {"total": 0, "used": 0, "free": 0, "percent": 0}
-            
-        disk = psutil.disk_usage('/')
-        return {
-            "total": self.bytes_to_gb(disk.total),
-            "used": self.bytes_to_gb(disk.used),
-            "free": self.bytes_to_gb(disk.free),
-            "percent": (disk.used / disk.total) * 100
-        }
+        """Usage and I/O of every mounted filesystem, without spawning df"""
+        try:
+            if self.disk_monitor is None:
+                from proc_metrics import DiskMonitor
+                self.disk_monitor = DiskMonitor()
+            disks = self.disk_monitor.update()
+        except OSError:
+            return []
+        for disk in disks:
+            for key in ("total", "used", "free"):
+                disk[key] = self.bytes_to_gb(disk[key])
+        return disks
     
     def get_network_info(self):
-        """Get network information"""
-        if not PSUTIL_AVAILABLE:
-            return None
-            
+        """Per-interface rates from two /proc/net/dev readings"""
         try:
-            stats = psutil.net_io_counters()
-            return {
-                "bytes_sent": self.bytes_to_mb(stats.bytes_sent),
-                "bytes_recv": self.bytes_to_mb(stats.bytes_recv),
-                "packets_sent": stats.packets_sent,
-                "packets_recv": stats.packets_recv
-            }
-        except:
-            return None
+            if self.network_monitor is None:
+                from proc_metrics import NetworkMonitor
+                self.network_monitor = NetworkMonitor()
+            return self.network_monitor.update()
+        except OSError:
+            return []
+    
+    def get_sensors(self):
+        """All temperature sensors (hwmon and thermal zones) in °C"""
+        if self.sensors is None:
+            from proc_metrics import SensorRegistry
+            self.sensors = SensorRegistry()
+        return self.sensors.read()
     
     def get_temperature(self):
         """Get CPU temperature"""
-        if not PSUTIL_AVAILABLE:
-            return "N/A"
-            
+        if self.sample and self.sample["temp"] is not None:
+            return f"{self.sample['temp']:.1f}°C"
         try:
-            temps = psutil.sensors_temperatures()
-            if 'coretemp' in temps:
-                return f"{temps['coretemp'][0].current:.1f}°C"
-            elif 'cpu_thermal' in temps:
-                return f"{temps['cpu_thermal'][0].current:.1f}°C"
+            self.get_sensors()
+            temp = self.sensors.cpu_temperature()
+            if temp is not None:
+                return f"{temp:.1f}°C"
         except:
             pass
         return "N/A"
     
+    def get_gpu_info(self):
+        """Every GPU the kernel drivers report in sysfs"""
+        try:
+            if self.gpu_monitor is None:
+                from proc_metrics import GpuMonitor
+                self.gpu_monitor = GpuMonitor()
+            return self.gpu_monitor.read()
+        except OSError:
+            return []
+    
     def get_battery_info(self):
         """Get battery information"""
-        if not PSUTIL_AVAILABLE:
+        if not psutil_available():
             return None
             
         try:
@@ -147,6 +207,42 @@ class SystemInfo:
             pass
         return None
     
+    def quick_stats(self):
+        """CPU %, memory %, temperature and network rates for --notify
+
+        Uses the collector when it runs; otherwise CPU and network are
+        deltas against the snapshots left by the previous call (only the
+        very first call waits briefly) while temperatures and the network
+        are read in parallel with the CPU.
+        """
+        if self.sample:
+            network = (self.sample.get("net_rx"), self.sample.get("net_tx"))
+            return self.sample["cpu"] or 0, self.sample["mem_percent"] or 0, self.sample["temp"], network
+
+        import threading
+        from proc_metrics import SensorRegistry, SystemSampler
+
+        results = {}
+
+        def read_slow():
+            results["temp"] = SensorRegistry().cpu_temperature()
+            interfaces = self.get_network_info()
+            results["network"] = (
+                sum(i["rx"] for i in interfaces),
+                sum(i["tx"] for i in interfaces),
+            )
+
+        reader = threading.Thread(target=read_slow)
+        reader.start()
+        usage = SystemSampler().sample(min_age=0.1)
+        reader.join()
+        return (
+            usage["cpu"],
+            usage["memory"]["percent"],
+            results.get("temp"),
+            results.get("network", (None, None)),
+        )
+    
     def bytes_to_gb(self, bytes_val):
         """Convert bytes to GB"""
         return round(bytes_val / (1024**3), 2)
@@ -155,6 +251,14 @@ class SystemInfo:
         """Convert bytes to MB"""
         return round(bytes_val / (1024**2), 2)
     
+    def format_rate(self, bytes_per_sec):
+        """Human readable transfer rate"""
+        for unit in ("B", "KB", "MB"):
+            if bytes_per_sec < 1024:
+                return f"{bytes_per_sec:.1f}{unit}/s"
+            bytes_per_sec /= 1024
+        return f"{bytes_per_sec:.1f}GB/s"
+    
     def get_progress_bar(self, percent, width=20):
         """Create a text progress bar"""
         filled = int(width * percent / 100)
@@ -163,91 +267,200 @@ class SystemInfo:
     
     def display_dashboard(self):
         """Display the complete system dashboard"""
-        print("🖥️  SYSTEM DASHBOARD")
-        print("=" * 50)
+        for line in self.dashboard_lines():
+            print(line)
+    
+    def watch(self, interval=1.0):
+        """Live dashboard that keeps its collectors warm between refreshes"""
+        import term_render
+
+        def frame():
+            self.sample = metrics_ring.latest()
+            return self.dashboard_lines()
+
+        term_render.watch(frame, interval)
+    
+    def history_lines(self, span_text="1h"):
+        """Sparklines of the collector's history over the last span"""
+        import shutil
+        import time
+        import metrics_history
+
+        span = metrics_history.parse_span(span_text)
+        tier, resolution, records = metrics_history.query(span)
+        if not records:
+            yield "❌ No history yet (metrics-collector.py records it)"
+            return
+
+        now = time.time()
+        width = max(10, min(120, shutil.get_terminal_size().columns - 34))
+        yield f"📈 HISTORY: last {span_text} ({len(records)} × {resolution}s records, {tier} tier)"
+        yield "=" * 50
+
+        rows = [
+            ("CPU", "cpu", "%", 100),
+            ("CPU peak", "cpu_max", "%", 100),
+            ("Memory", "mem_percent", "%", 100),
+            ("Temp", "temp", "°C", None),
+            ("Temp peak", "temp_max", "°C", None),
+            ("Battery", "battery", "%", 100),
+        ]
+        rows += [
+            (f"Core {name[3:]}", name, "%", 100)
+            for name in metrics_ring.core_fields(records[-1])
+        ]
+        for label, field, unit, high in rows:
+            values = [r[field] for r in records if r.get(field) is not None]
+            if not values:
+                continue
+            line = metrics_history.sparkline(
+                metrics_history.columns(records, field, now - span, span, width),
+                0 if high else None,
+                high,
+            )
+            yield (
+                f"   {label:<10}{line} "
+                f"avg {sum(values) / len(values):.1f}{unit} max {max(values):.1f}{unit}"
+            )
+
+    def dashboard_lines(self):
+        """Lines of the dashboard, produced as each section is collected"""
+        yield "🖥️  SYSTEM DASHBOARD"
+        yield "=" * 50
         
         # Basic info
-        print(f"🏠 Hostname: {self.hostname}")
-        print(f"⏰ Uptime: {self.get_uptime()}")
-        print(f"📅 Date: {datetime.now().strftime('%A, %B %d, %Y %H:%M:%S')}")
-        print()
+        yield f"🏠 Hostname: {self.hostname}"
+        yield f"⏰ Uptime: {self.get_uptime()}"
+        yield f"📅 Date: {datetime.now().strftime('%A, %B %d, %Y %H:%M:%S')}"
+        yield ""
         
         # CPU Info
         cpu = self.get_cpu_info()
-        print(f"🔧 CPU: {cpu['cores']} cores @ {cpu['frequency']}")
-        print(f"   Usage: {self.get_progress_bar(cpu['usage'])}")
-        print(f"   Temperature: {self.get_temperature()}")
-        print()
+        yield f"🔧 CPU: {cpu['cores']} cores @ {cpu['frequency']}"
+        yield f"   Usage: {self.get_progress_bar(cpu['usage'])}"
+        yield f"   Temperature: {self.get_temperature()}"
+        yield ""
+        
+        # Other sensors (NVMe, GPU, chipset, ...)
+        try:
+            sensors = self.get_sensors()
+        except OSError:
+            sensors = {}
+        if len(sensors) > 1:
+            yield "🌡️ Sensors:"
+            for name, value in sensors.items():
+                yield f"   {name}: {value:.1f}°C"
+            yield ""
         
         # Memory Info
         memory = self.get_memory_info()
-        print(f"💾 Memory: {memory['used']}GB / {memory['total']}GB")
-        print(f"   Usage: {self.get_progress_bar(memory['percent'])}")
+        yield f"💾 Memory: {memory['used']}GB / {memory['total']}GB"
+        yield f"   Usage: {self.get_progress_bar(memory['percent'])}"
         if memory['swap_total'] > 0:
-            print(f"   Swap: {memory['swap_used']}GB / {memory['swap_total']}GB")
-            print(f"   Swap: {self.get_progress_bar(memory['swap_percent'])}")
-        print()
+            yield f"   Swap: {memory['swap_used']}GB / {memory['swap_total']}GB"
+            yield f"   Swap: {self.get_progress_bar(memory['swap_percent'])}"
+        yield ""
         
         # Disk Info
-        disk = self.get_disk_info()
-        print(f"💿 Disk: {disk['used']}GB / {disk['total']}GB")
-        print(f"   Usage: {self.get_progress_bar(disk['percent'])}")
-        print(f"   Free: {disk['free']}GB")
-        print()
+        disks = self.get_disk_info()
+        yield "💿 Disks:"
+        for disk in disks:
+            yield f"   {disk['mount']} ({disk['type']}): {disk['used']}GB / {disk['total']}GB, {disk['free']}GB free"
+            yield f"      Usage: {self.get_progress_bar(disk['percent'])}"
+            if disk['read'] is not None:
+                yield (
+                    f"      I/O: read {self.format_rate(disk['read'])} | "
+                    f"write {self.format_rate(disk['write'])} | {disk['util']:.0f}% busy"
+                )
+        if not disks:
+            yield "   No mounted disks found"
+        yield ""
         
         # Network Info
-        network = self.get_network_info()
-        if network:
-            print(f"🌐 Network:")
-            print(f"   Sent: {network['bytes_sent']}MB ({network['packets_sent']} packets)")
-            print(f"   Received: {network['bytes_recv']}MB ({network['packets_recv']} packets)")
-            print()
+        interfaces = self.get_network_info()
+        if interfaces:
+            yield "🌐 Network:"
+            for interface in interfaces:
+                yield (
+                    f"   {interface['name']}: ⬇ {self.format_rate(interface['rx'])} "
+                    f"({interface['rx_packets']:.0f} pkt/s) | "
+                    f"⬆ {self.format_rate(interface['tx'])} ({interface['tx_packets']:.0f} pkt/s)"
+                )
+                errors = interface['rx_errors'] + interface['tx_errors']
+                drops = interface['rx_drops'] + interface['tx_drops']
+                if errors or drops:
+                    yield (
+                        f"      Errors: {interface['rx_errors']} rx / {interface['tx_errors']} tx | "
+                        f"Drops: {interface['rx_drops']} rx / {interface['tx_drops']} tx"
+                    )
+            yield ""
+        
+        # GPU Info
+        for gpu in self.get_gpu_info():
+            yield f"🎮 GPU: {gpu['card']} ({gpu['driver']})"
+            if 'busy' in gpu:
+                yield f"   Usage: {self.get_progress_bar(gpu['busy'])}"
+            details = []
+            if 'freq' in gpu:
+                top = f"/{gpu['max_freq']}" if 'max_freq' in gpu else ""
+                details.append(f"Clock: {gpu['freq']}{top}MHz")
+            if 'vram_total' in gpu:
+                details.append(f"VRAM: {self.bytes_to_gb(gpu.get('vram_used', 0))}GB / {self.bytes_to_gb(gpu['vram_total'])}GB")
+            if 'temp' in gpu:
+                details.append(f"Temp: {gpu['temp']:.1f}°C")
+            if 'power' in gpu:
+                details.append(f"Power: {gpu['power']:.1f}W")
+            yield f"   {' | '.join(details)}" if details else "   No sysfs metrics from this driver"
+            yield ""
         
         # Battery Info
         battery = self.get_battery_info()
         if battery:
-            print(f"🔋 Battery: {battery['percent']}% - {battery['status']}")
-            print(f"   Time left: {battery['time_left']}")
-            print()
+            yield f"🔋 Battery: {battery['percent']}% - {battery['status']}"
+            yield f"   Time left: {battery['time_left']}"
+            yield ""
         
         # Top processes
-        print("🔝 Top 5 Processes (by CPU):")
-        if not PSUTIL_AVAILABLE:
-            print("   psutil not available - install with: sudo pacman -S python-psutil")
-        else:
-            try:
-                processes = []
-                for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-                    try:
-                        proc_info = proc.info
-                        if proc_info['cpu_percent'] > 0:
-                            processes.append(proc_info)
-                    except:
-                        pass
-                
-                processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-                for i, proc in enumerate(processes[:5], 1):
-                    print(f"   {i}. {proc['name']} (PID: {proc['pid']}) - {proc['cpu_percent']:.1f}%")
-            except:
-                print("   Unable to fetch process information")
+        yield "🔝 Top 5 Processes (by CPU):"
+        try:
+            from proc_metrics import ProcessTracker
+
+            if self.process_tracker is None:
+                import time
+                self.process_tracker = ProcessTracker()
+                self.process_tracker.scan()
+                time.sleep(0.25)
+            tracker = self.process_tracker
+            busiest = [p for p in tracker.top(tracker.scan()) if p[2] > 0]
+            for i, (pid, name, percent) in enumerate(busiest, 1):
+                yield f"   {i}. {name} (PID: {pid}) - {percent:.1f}%"
+            if not busiest:
+                yield "   All processes idle"
+        except OSError:
+            yield "   Unable to fetch process information"
 
 def main():
     system_info = SystemInfo()
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--notify":
+    if len(sys.argv) > 1 and sys.argv[1] == "--watch":
+        interval = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+        system_info.watch(interval)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--history":
+        for line in system_info.history_lines(sys.argv[2] if len(sys.argv) > 2 else "1h"):
+            print(line)
+    elif len(sys.argv) > 1 and sys.argv[1] == "--notify":
         # Send a notification with basic info
-        cpu = system_info.get_cpu_info()
-        memory = system_info.get_memory_info()
-        temp = system_info.get_temperature()
+        cpu, memory, temp, (rx, tx) = system_info.quick_stats()
+        temp = f"{temp:.1f}°C" if temp is not None else "N/A"
         
-        message = f"CPU: {cpu['usage']:.1f}% | RAM: {memory['percent']:.1f}% | Temp: {temp}"
+        message = f"CPU: {cpu:.1f}% | RAM: {memory:.1f}% | Temp: {temp}"
+        if rx is not None:
+            message += f" | Net: ⬇ {system_info.format_rate(rx)} ⬆ {system_info.format_rate(tx)}"
         
-        try:
-            subprocess.run([
-                "notify-send", "-i", "computer",
-                "-t", "5000", "System Stats", message
-            ], check=False)
-        except:
+        import desktop_notify
+        if not desktop_notify.notify(
+            message, "System Stats", icon="computer", timeout=5000, channel="system"
+        ):
             print(message)
     else:
         system_info.display_dashboard()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Differential Terminal Rendering
+Shared by the --watch modes of the dashboards. Each frame is a list of
+lines; only lines that differ from the previous frame are redrawn, with
+cursor addressing, and the whole frame goes out in a single write. A
+terminal resize (SIGWINCH) forces one full redraw.
+"""
+
+import os
+import signal
+import sys
+import time
+
+
+def display_width(char):
+    """Terminal cells taken by one character"""
+    if ord(char) < 0x1100:
+        return 1
+    import unicodedata
+
+    # Variation selectors and joiners inside emoji take no cell of their own
+    if unicodedata.combining(char) or char in "\ufe0f\u200d":
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in "WF" else 1
+
+
+def clip(line, width):
+    """Cut a line so it never wraps, which would shift every line below it"""
+    used = 0
+    for i, char in enumerate(line):
+        used += display_width(char)
+        if used > width:
+            return line[:i]
+    return line
+
+
+class DiffRenderer:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.fd = self.stream.fileno()
+        self.previous = []
+        self.resized = True
+        self.old_handler = None
+
+    def on_resize(self, *_):
+        self.resized = True
+
+    def __enter__(self):
+        self.old_handler = signal.signal(signal.SIGWINCH, self.on_resize)
+        # Alternate screen and hidden cursor, like top
+        self.write("\033[?1049h\033[?25l")
+        return self
+
+    def __exit__(self, *_):
+        signal.signal(signal.SIGWINCH, self.old_handler or signal.SIG_DFL)
+        self.write("\033[?25h\033[?1049l")
+
+    def write(self, text):
+        data = text.encode()
+        while data:
+            written = os.write(self.fd, data)
+            data = data[written:]
+
+    def render(self, lines):
+        """Draw one frame, touching only the lines that changed"""
+        try:
+            columns, rows = os.get_terminal_size(self.fd)
+        except OSError:
+            columns, rows = 80, 24
+        lines = [clip(line, columns) for line in lines[:rows]]
+
+        parts = []
+        if self.resized:
+            self.resized = False
+            self.previous = []
+            parts.append("\033[2J")
+
+        for row, line in enumerate(lines):
+            if row >= len(self.previous) or self.previous[row] != line:
+                parts.append(f"\033[{row + 1};1H{line}\033[K")
+        for row in range(len(lines), len(self.previous)):
+            parts.append(f"\033[{row + 1};1H\033[K")
+
+        if parts:
+            self.write("".join(parts))
+        self.previous = lines
+        return len(parts)
+
+
+def watch(frame, interval=1.0):
+    """Render frame() every interval seconds until Ctrl+C
+
+    frame returns the lines to show; it is expected to keep its collectors
+    warm between calls so a refresh costs only the reads themselves.
+    """
+    with DiffRenderer() as renderer:
+        deadline = time.monotonic()
+        try:
+            while True:
+                renderer.render(list(frame()))
+                deadline += interval
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.monotonic()
+        except KeyboardInterrupt:
+            pass
@@ -7,14 +7,18 @@ Features:
 - Random wallpaper selection
 - Better error handling
 - Notification support
+- Cached pywal palettes (palette_cache.py), precomputed in parallel with
+  --precompute [--idle]
 """
 
 import os
-import random
 import subprocess
 import sys
 from pathlib import Path
 
+import desktop_notify
+from palette_cache import PaletteCache
+
 class WallpaperSwitcher:
     def __init__(self):
         self.home = Path.home()
@@ -22,18 +26,17 @@ class WallpaperSwitcher:
         self.config_dir = self.home / ".config" / "hypr"
         self.wallpaper_config = self.config_dir / "wallpapers.conf"
         self.hyprpaper_config = self.config_dir / "hyprpaper.conf"
+        self.palettes = PaletteCache()
         
         # Ensure wallpaper directory exists
         self.wallpaper_dir.mkdir(exist_ok=True)
         
     def notify(self, message, title="Wallpaper Switcher"):
         """Send desktop notification"""
-        try:
-            subprocess.run([
-                "notify-send", "-i", "preferences-desktop-wallpaper",
-                "-t", "3000", title, message
-            ], check=False)
-        except FileNotFoundError:
+        if not desktop_notify.notify(
+            message, title, icon="preferences-desktop-wallpaper",
+            timeout=3000, channel="wallpaper"
+        ):
             print(f"📱 {title}: {message}")
     
     def get_image_files(self):
@@ -51,8 +54,8 @@ class WallpaperSwitcher:
             return False
             
         try:
-            # Generate color scheme with pywal
-            subprocess.run(["wal", "-i", str(image_path)], check=True)
+            # Apply the cached color scheme, or generate it with pywal
+            self.palettes.apply(image_path, quiet=False)
             
             # Update Hyprland wallpaper config
             with open(self.wallpaper_config, "w") as f:
@@ -72,12 +75,78 @@ class WallpaperSwitcher:
             self.notify(f"✅ Wallpaper set: {image_path.name}")
             return True
             
-        except subprocess.CalledProcessError as e:
+        except (OSError, subprocess.CalledProcessError) as e:
             self.notify(f"❌ Failed to set wallpaper: {e}", "Error")
             return False
     
+    def precompute_palettes(self, idle=False):
+        """Generate the palette of every wallpaper missing from the cache
+
+        Runs pywal's colour extraction in a process pool with one worker
+        per usable core. With idle=True the workers only get CPU time
+        nothing else wants (SCHED_IDLE), for running from hypridle.
+        """
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        import importlib.util
+        import time
+        from palette_cache import generate, lower_priority
+
+        # The workers import pywal; here it only has to be there
+        if importlib.util.find_spec("pywal") is None:
+            print("❌ pywal is not installed (python-pywal)")
+            return False
+
+        if idle:
+            lower_priority()
+        images = sorted(str(image) for image in self.get_image_files())
+        pending = self.palettes.missing(images)
+        if not pending:
+            print(f"✅ All {len(images)} wallpapers already have a palette")
+            return True
+        if len(pending) > self.palettes.max_palettes:
+            print(f"⚠️ Only the first {self.palettes.max_palettes} of {len(pending)} fit in the cache")
+            pending = pending[: self.palettes.max_palettes]
+
+        try:
+            workers = len(os.sched_getaffinity(0))
+        except AttributeError:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(pending))
+        print(f"🎨 Generating {len(pending)} palettes with {workers} workers")
+
+        start = time.perf_counter()
+        done = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=lower_priority if idle else None
+        ) as pool:
+            futures = [pool.submit(generate, image) for image in pending]
+            for future in as_completed(futures):
+                image, colors, error = future.result()
+                done += 1
+                if colors:
+                    self.palettes.store(image, colors)
+                else:
+                    failed += 1
+                    print(f"\n❌ {Path(image).name}: {error}")
+                rate = done / (time.perf_counter() - start)
+                print(
+                    f"\r   [{done}/{len(pending)}] {rate:.2f} images/s  {Path(image).name[:40]:<40}",
+                    end="",
+                    flush=True,
+                )
+
+        elapsed = time.perf_counter() - start
+        print(
+            f"\n✅ {done - failed} palettes in {elapsed:.1f}s "
+            f"({done / elapsed:.2f} images/s), {failed} failed"
+        )
+        if not idle:
+            self.notify(f"🎨 Precomputed {done - failed} palettes")
+        return failed == 0
+    
     def random_wallpaper(self):
         """Set a random wallpaper from the wallpaper directory"""
+        import random
         images = self.get_image_files()
         if not images:
             self.notify("❌ No wallpapers found in ~/Wallpapers", "Error")
@@ -143,6 +212,9 @@ def main():
     if len(sys.argv) > 1:
         if sys.argv[1] == "--random":
             switcher.random_wallpaper()
+        elif sys.argv[1] == "--precompute":
+            ok = switcher.precompute_palettes(idle="--idle" in sys.argv[2:])
+            sys.exit(0 if ok else 1)
         else:
             switcher.set_wallpaper(sys.argv[1])
     else:
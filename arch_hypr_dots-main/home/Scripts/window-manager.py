@@ -9,6 +9,8 @@ import sys
 import json
 import time
 
+import desktop_notify
+
 class HyprlandWindowManager:
     def __init__(self):
         self.presets = {
@@ -91,12 +93,10 @@ class HyprlandWindowManager:
     
     def notify(self, message, title="Window Manager"):
         """Send desktop notification"""
-        try:
-            subprocess.run([
-                "notify-send", "-i", "preferences-system-windows",
-                "-t", "3000", title, message
-            ], check=False)
-        except:
+        if not desktop_notify.notify(
+            message, title, icon="preferences-system-windows",
+            timeout=3000, channel="window"
+        ):
             print(f"🪟 {title}: {message}")
     
     def smart_split(self, direction="auto"):
@@ -3,6 +3,7 @@ import os
 from modules.install_homefiles import install_homefiles
 from modules.install_packages import install_packages
 from modules.post_install import post_install
+from modules.rank_mirrors import rank_mirrors
 from tools.log_tools import clear_log, log_cmd, log_print
 from tools.selection_tools import bool_selection, list_selection
 
@@ -56,6 +57,9 @@ selected_drivers = drivers[
 ]
 do_backup = bool_selection("Do you want to backup config files?", True)
 do_ly_dm = bool_selection("Do you want to install Ly DM?", True)
+do_rank_mirrors = bool_selection(
+    "Do you want to rank mirrors by speed before installing?", True
+)
 do_update_system = bool_selection(
     "Do you want to update your system after install?", True
 )
@@ -69,6 +73,9 @@ log_print(r"""
                                          |___/  |_|                    |___/
 """)
 
+if do_rank_mirrors:
+    rank_mirrors()
+
 install_packages(selected_drivers, do_ly_dm, do_update_system)
 
 log_print(r"""
@@ -86,6 +86,7 @@ def install_packages(selected_drivers, do_ly_dm, do_update_system):
             "zoxide",
             "starship",
             "python-psutil",
+            "python-jeepney",
             "python-pip",
             "libinput",
             "xdotool",
@@ -35,6 +35,17 @@ def post_install(do_reboot, do_ly_dm):
         "gsettings set org.gnome.desktop.interface font-name 'Noto Sans Regular 11'"
     )
 
+    # CPU policy helper for performance modes: root-owned copy plus sudoers rule
+    log_cmd(
+        f"sudo install -o root -g root -m 755 {home}/Scripts/cpufreq-helper.py "
+        "/usr/local/bin/choso-cpufreq-helper"
+    )
+    log_cmd(
+        'echo "$USER ALL=(root) NOPASSWD: /usr/local/bin/choso-cpufreq-helper" '
+        "| sudo tee /etc/sudoers.d/choso-cpufreq && "
+        "sudo chmod 440 /etc/sudoers.d/choso-cpufreq"
+    )
+
     # Setup advanced gestures
     log_cmd("python ~/Scripts/gesture-manager.py --setup")
     log_cmd(f"sudo usermod -a -G input $USER")
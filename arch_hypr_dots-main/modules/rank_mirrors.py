@@ -0,0 +1,255 @@
+import asyncio
+import os
+import re
+import shutil
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from tools.log_tools import err_log, log, log_cmd, log_print
+
+MIRRORLIST = "/etc/pacman.d/mirrorlist"
+
+SERVER_LINE = re.compile(r"^\s*#?\s*Server\s*=\s*(\S+)")
+
+
+def read_candidates(mirrorlist=MIRRORLIST):
+    # Commented-out servers count too: the stock list ships everything commented
+    candidates = []
+    try:
+        with open(mirrorlist, "r") as file:
+            for line in file:
+                match = SERVER_LINE.match(line)
+                if match and match.group(1) not in candidates:
+                    candidates.append(match.group(1))
+    except OSError as e:
+        err_log(e)
+    return candidates
+
+
+def probe_url(server, arch=None):
+    arch = arch or os.uname().machine
+    base = server.replace("$repo", "core").replace("$arch", arch).rstrip("/")
+    return f"{base}/core.db"
+
+
+async def probe_mirror(server, probe_bytes=256 * 1024, arch=None):
+    url = urlsplit(probe_url(server, arch))
+    https = url.scheme == "https"
+    port = url.port or (443 if https else 80)
+    path = url.path + (f"?{url.query}" if url.query else "")
+
+    start = time.monotonic()
+    reader, writer = await asyncio.open_connection(
+        url.hostname,
+        port,
+        ssl=ssl.create_default_context() if https else None,
+        server_hostname=url.hostname if https else None,
+    )
+    try:
+        writer.write(
+            (
+                f"GET {path} HTTP/1.1\r\n"
+                f"Host: {url.hostname}\r\n"
+                f"Range: bytes=0-{probe_bytes - 1}\r\n"
+                "User-Agent: arch_hypr_dots-mirror-rank\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+        )
+        await writer.drain()
+
+        status_line = await reader.readline()
+        latency = time.monotonic() - start
+        status = status_line.split()
+        if len(status) < 2 or status[1] not in (b"200", b"206"):
+            raise ConnectionError(f"{server}: bad response {status_line!r}")
+
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+
+        # Servers ignoring Range answer 200 with the whole file; stop at probe_bytes
+        received = 0
+        transfer_start = time.monotonic()
+        while received < probe_bytes:
+            chunk = await reader.read(64 * 1024)
+            if not chunk:
+                break
+            received += len(chunk)
+        transfer = max(time.monotonic() - transfer_start, 1e-6)
+    finally:
+        writer.close()
+
+    if received == 0:
+        raise ConnectionError(f"{server}: empty response")
+
+    return {"server": server, "latency": latency, "throughput": received / transfer}
+
+
+async def benchmark_mirrors(
+    servers, probe_bytes=256 * 1024, timeout=5.0, concurrency=32, arch=None
+):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(server):
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    probe_mirror(server, probe_bytes, arch), timeout
+                )
+            except Exception as e:
+                log(f"Mirror probe failed: {server}: {type(e).__name__}: {e}")
+                return None
+
+    results = await asyncio.gather(*(bounded(server) for server in servers))
+    ranked = [result for result in results if result]
+    ranked.sort(key=lambda result: (-result["throughput"], result["latency"]))
+    return ranked
+
+
+def write_mirrorlist(servers, mirrorlist=MIRRORLIST, spare=()):
+    """Use servers in order; spare ones stay listed below, commented out"""
+    content = "# Ranked by arch_hypr_dots installer\n" + "".join(
+        f"Server = {server}\n" for server in servers
+    )
+    if spare:
+        content += "\n# Slower or unreachable mirrors, kept for manual use\n" + "".join(
+            f"#Server = {server}\n" for server in spare
+        )
+
+    if os.access(mirrorlist, os.W_OK):
+        shutil.copyfile(mirrorlist, f"{mirrorlist}.backup")
+        with open(mirrorlist, "w") as file:
+            file.write(content)
+        return
+
+    with tempfile.NamedTemporaryFile("w", suffix=".mirrorlist", delete=False) as file:
+        file.write(content)
+    log_cmd(
+        f"sudo cp {mirrorlist} {mirrorlist}.backup && "
+        f"sudo install -m 644 {file.name} {mirrorlist}"
+    )
+    os.unlink(file.name)
+
+
+def rank_mirrors(
+    top_n=10,
+    mirrorlist=MIRRORLIST,
+    candidates=None,
+    probe_bytes=256 * 1024,
+    timeout=5.0,
+    concurrency=32,
+    write=True,
+):
+    candidates = candidates if candidates is not None else read_candidates(mirrorlist)
+    if not candidates:
+        log_print("No mirrors found to rank, keeping current mirrorlist")
+        return []
+
+    log_print(f"Benchmarking {len(candidates)} mirrors...")
+    results = asyncio.run(
+        benchmark_mirrors(candidates, probe_bytes, timeout, concurrency)
+    )
+    ranked = results[:top_n]
+
+    for result in ranked:
+        log_print(
+            f"{result['throughput'] / 1024 / 1024:8.2f} MiB/s "
+            f"{result['latency'] * 1000:7.1f} ms  {result['server']}"
+        )
+
+    if not ranked:
+        log_print("No mirror answered in time, keeping current mirrorlist")
+    elif write:
+        servers = [result["server"] for result in ranked]
+        # Ranked ones first, then those that failed in their original order
+        spare = [result["server"] for result in results[top_n:]]
+        spare += [server for server in candidates if server not in servers + spare]
+        write_mirrorlist(servers, mirrorlist, spare)
+
+    return ranked
+
+
+async def serve_test_mirror(reader, writer, behaviour, probe_bytes):
+    """One local mirror for self_check(): fast, slow, norange, missing or hang"""
+    await reader.readuntil(b"\r\n\r\n")
+    if behaviour == "hang":
+        # Never answers; returns once the client gives up and disconnects
+        await reader.read()
+    elif behaviour == "missing":
+        writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+    else:
+        # norange ignores the Range header and sends more than was asked for
+        size = probe_bytes * 4 if behaviour == "norange" else probe_bytes
+        status = "200 OK" if behaviour == "norange" else "206 Partial Content"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: {size}\r\n\r\n".encode())
+        chunk = b"\0" * (16 * 1024)
+        for _ in range(size // len(chunk)):
+            writer.write(chunk)
+            await writer.drain()
+            if behaviour == "slow":
+                await asyncio.sleep(0.05)
+    try:
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+def self_check(probe_bytes=64 * 1024):
+    """Rank and write a mirrorlist of local HTTP mirrors with known behaviour"""
+    behaviours = ["missing", "slow", "hang", "fast", "norange"]
+    loop = asyncio.new_event_loop()
+    servers = {}
+
+    async def start():
+        for behaviour in behaviours:
+            server = await asyncio.start_server(
+                lambda r, w, b=behaviour: serve_test_mirror(r, w, b, probe_bytes),
+                "127.0.0.1",
+                0,
+            )
+            port = server.sockets[0].getsockname()[1]
+            servers[f"http://127.0.0.1:{port}/{behaviour}/$repo/os/$arch"] = behaviour
+
+    loop.run_until_complete(start())
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        mirrorlist = os.path.join(tmp, "mirrorlist")
+        original = "".join(f"#Server = {server}\n" for server in servers)
+        with open(mirrorlist, "w") as file:
+            file.write(original)
+
+        ranked = rank_mirrors(2, mirrorlist, probe_bytes=probe_bytes, timeout=1.0)
+        order = [servers[result["server"]] for result in ranked]
+        with open(mirrorlist, "r") as file:
+            written = file.read()
+        with open(f"{mirrorlist}.backup", "r") as file:
+            backup = file.read()
+
+    loop.call_soon_threadsafe(loop.stop)
+
+    if sorted(order) != ["fast", "norange"]:
+        failures.append(f"expected fast and norange on top, got {order}")
+    active = [s for s in servers if f"\nServer = {s}\n" in "\n" + written]
+    if sorted(servers[s] for s in active) != ["fast", "norange"]:
+        failures.append(f"active servers {active}")
+    if not all(f"#Server = {s}\n" in written for s in servers if s not in active):
+        failures.append("servers beyond the top ones were dropped")
+    if backup != original:
+        failures.append("no backup of the previous mirrorlist")
+
+    for failure in failures:
+        log_print(f"❌ {failure}")
+    if not failures:
+        log_print("✅ Mirror ranking works against local mirrors")
+    return not failures
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        sys.exit(0 if self_check() else 1)
+    rank_mirrors(write=False)